@@ -0,0 +1,122 @@
+import hmac
+
+import streamlit as st
+
+import config
+from lazy import lazy_import
+from results import HRDD_CHAIN_METRICS, HRDD_METRICS, MAT_METRICS, STEP_SECTIONS, STEPS, TCFD_METRICS
+
+pd = lazy_import("pandas")
+
+# =================================================================================================
+# 管理頁 (?admin=<SA_ADMIN_TOKEN>)：目前活動的即時統計
+# 數字全部來自 ResponseStore 的增量彙總表 (score_totals / department_counts)，
+# 每次重新整理只讀取 O(議題數) 列，不隨填答人數增加；以 fragment 定時重跑
+# =================================================================================================
+
+# (分頁標題, section, 指標順序)
+SECTION_TABS = (
+    ("Stakeholder", ("stakeholder",), None),
+    ("Materiality", ("materiality",), MAT_METRICS[1:]),
+    ("TCFD", ("tcfd_opp", "tcfd_risk"), TCFD_METRICS),
+    ("HRDD", ("hrdd",), HRDD_METRICS + HRDD_CHAIN_METRICS),
+)
+TCFD_TYPES = {"tcfd_opp": "Opportunity", "tcfd_risk": "Risk"}
+TOP_TOPICS = 10
+
+
+def is_admin_request():
+    return "admin" in st.query_params
+
+
+def check_token(token):
+    if not config.ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), config.ADMIN_TOKEN.encode("utf-8"))
+
+
+def topic_averages(totals, sections, metrics=None):
+    # (section, topic, metric, n, total) -> 每列一個議題，欄位為各指標平均
+    part = totals[totals["section"].isin(sections)]
+    if part.empty:
+        return part
+    part = part.assign(average=part["total"] / part["n"])
+    index = ["section", "topic"] if len(sections) > 1 else ["topic"]
+    table = part.pivot_table(index=index, columns="metric", values="average", aggfunc="first")
+    if metrics is not None:
+        table = table.reindex(columns=[m for m in metrics if m in table.columns])
+    table.columns.name = None
+    table.insert(0, "Responses", part.groupby(index)["n"].max())
+    table = table.sort_values("Responses", ascending=False).reset_index()
+    if len(sections) > 1:
+        table["section"] = table["section"].map(TCFD_TYPES)
+        table = table.rename(columns={"section": "Type"}).sort_values(["Type", "Responses"], ascending=[True, False])
+    return table.rename(columns={"topic": "Topic"})
+
+
+class AdminDashboard:
+    def __init__(self, store, campaign=config.CAMPAIGN, steps=STEPS):
+        self.store = store
+        self.campaign = campaign
+        # 完成人數 = 活動最後一個步驟的作答人數
+        self.last_section = STEP_SECTIONS[steps[-1]][0]
+
+    def run(self):
+        st.title(f"Assessment Dashboard: {self.campaign}")
+        if not check_token(st.query_params.get("admin", "")):
+            st.error("Admin access is disabled or the token is invalid.")
+            return
+        if self.store is None:
+            st.warning("Response persistence is disabled (SA_DB_PATH is empty); there is nothing to show.")
+            return
+        st.caption(f"Refreshes every {config.ADMIN_REFRESH_SECONDS:g} seconds.")
+        st.fragment(self.render_stats, run_every=config.ADMIN_REFRESH_SECONDS)()
+
+    def render_stats(self):
+        departments = pd.DataFrame(self.store.read_department_counts(self.campaign), columns=["Department", "Respondents"])
+        departments["Department"] = departments["Department"].replace("", "(Unknown)")
+        totals = pd.DataFrame(
+            self.store.read_totals(self.campaign), columns=["section", "topic", "metric", "n", "total"]
+        )
+        n_respondents = int(departments["Respondents"].sum())
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Respondents", n_respondents)
+        c2.metric("Departments", len(departments))
+        completed = totals.loc[totals["section"] == self.last_section, "n"]
+        c3.metric("Completed", int(completed.max()) if len(completed) else 0)
+
+        left, right = st.columns(2)
+        with left:
+            st.subheader("Responses by department")
+            if len(departments):
+                st.bar_chart(departments, x="Department", y="Respondents", horizontal=True)
+            st.dataframe(departments, hide_index=True, width="stretch")
+        with right:
+            st.subheader(f"Top {TOP_TOPICS} material topics")
+            # Status 指標的筆數 = 選入此議題的填答人數；Actual = 1, Potential = 2
+            status = totals[(totals["section"] == "materiality") & (totals["metric"] == MAT_METRICS[0])]
+            top = status.nlargest(TOP_TOPICS, "n")
+            st.dataframe(
+                pd.DataFrame({
+                    "Topic": top["topic"],
+                    "Selected": top["n"],
+                    "Selection Rate": top["n"] / max(n_respondents, 1),
+                    "Actual Rate": (2 * top["n"] - top["total"]) / top["n"],
+                }),
+                hide_index=True,
+                width="stretch",
+                column_config={
+                    "Selection Rate": st.column_config.ProgressColumn(format="percent", min_value=0, max_value=1),
+                    "Actual Rate": st.column_config.NumberColumn(format="percent"),
+                },
+            )
+
+        st.subheader("Average scores by topic")
+        for tab, (title, sections, metrics) in zip(st.tabs([t[0] for t in SECTION_TABS]), SECTION_TABS):
+            with tab:
+                table = topic_averages(totals, sections, metrics)
+                if table.empty:
+                    st.info(f"No {title} responses yet.")
+                else:
+                    st.dataframe(table, hide_index=True, width="stretch")
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import metrics
+
+# =================================================================================================
+# 入場控制 (活動連結寄出後大量同時進入時的背壓)
+# - 同時作答的 session 上限 (SA_MAX_SESSIONS，每個 process 各自計算)：超過時新的 session 進入等候室，
+#   依進入順序排隊；等候室只顯示排隊位置，不建立 SustainabilityAssessment、不載入題庫 / NumPy，
+#   並以 fragment 每隔 SA_WAITING_ROOM_POLL 秒查詢一次，輪到時整頁重跑進入作答
+# - 作答中的 session 超過 SA_SESSION_IDLE 秒沒有 rerun 即釋放名額 (關閉分頁、離開)；完成頁不佔名額
+#   被釋放的 session 之後再回來 (例如 batched 模式填寫表單期間沒有 rerun) 直接重新進入，不排隊：
+#   進入等候室會讓該頁 widget 的作答值被清除
+# - 等候中的 session 超過 waiting_timeout 秒沒有查詢即移出佇列 (已關閉分頁)
+# - 每個 session 的 rerun 速率限制 (token bucket，SA_RERUN_RATE 次 / 秒，可累積 SA_RERUN_BURST 次)：
+#   超過時 throttle 回傳需等待的秒數，由 app.py 顯示提示並 st.stop()，不佔用 script thread 等待
+# 整個 process 共用一個實例 (由 app.py 以 st.cache_resource 建立)
+# =================================================================================================
+
+
+class AdmissionController:
+    def __init__(self, max_active=200, idle_seconds=900, waiting_timeout=30,
+                 rerun_rate=5.0, rerun_burst=10, max_idle_entries=10000):
+        # max_active <= 0：不限制 (仍追蹤作答中的 session 以輸出 gauge)
+        self.max_active = max_active
+        self.idle_seconds = idle_seconds
+        self.waiting_timeout = waiting_timeout
+        self.rerun_rate = rerun_rate
+        self.rerun_burst = rerun_burst
+        self.max_idle_entries = max_idle_entries
+        self._lock = threading.Lock()
+        # session -> 最後一次 rerun 的時間；依最後活動排序 (最舊的在前面，逾時檢查只看開頭)
+        self._active = OrderedDict()
+        # 因閒置而釋放名額的 session (LRU，最多 max_idle_entries 個)；再次出現時直接重新進入
+        self._idle = OrderedDict()
+        # session -> 最後一次查詢的時間；依進入等候室的順序排列
+        self._waiting = OrderedDict()
+        # session -> [可用次數, 更新時間]
+        self._buckets = {}
+        self._next_sweep = 0.0
+
+    def __len__(self):
+        return len(self._active)
+
+    @property
+    def waiting(self):
+        return len(self._waiting)
+
+    def admit(self, session, now=None):
+        # 回傳排隊位置：0 = 可以作答，>= 1 = 在等候室中的位置
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if session in self._active:
+                self._active[session] = now
+                self._active.move_to_end(session)
+                return 0
+            if self._idle.pop(session, None) is not None:
+                # 曾經作答中的 session：即使名額已滿也重新進入 (暫時超過上限，隨其他 session 離開而恢復)
+                self._active[session] = now
+                metrics.count("sa_sessions_readmitted_total")
+                self._publish()
+                return 0
+            queued = session in self._waiting
+            self._waiting[session] = now
+            # 先到先進：只有排在前面、且名額足夠的 session 可以進入 (新來的不會插隊)
+            free = self.max_active - len(self._active) if self.max_active > 0 else len(self._waiting)
+            position = 0
+            for waiting in self._waiting:
+                if waiting == session:
+                    break
+                position += 1
+            if position >= free:
+                if not queued:
+                    metrics.count("sa_sessions_queued_total")
+                self._publish()
+                return position - free + 1
+            del self._waiting[session]
+            self._active[session] = now
+            metrics.count("sa_sessions_admitted_total")
+            self._publish()
+            return 0
+
+    def touch(self, session, now=None):
+        # 只更新作答中 session 的最後活動時間 (例如 fragment 局部重跑)，不做入場判斷
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if session in self._active:
+                self._active[session] = now
+                self._active.move_to_end(session)
+
+    def release(self, session):
+        # 完成作答 / 離開：立即釋放名額 (不必等到 idle 逾時)
+        with self._lock:
+            released = self._active.pop(session, None) is not None
+            self._idle.pop(session, None)
+            self._waiting.pop(session, None)
+            self._buckets.pop(session, None)
+            if released:
+                self._publish()
+        return released
+
+    def throttle(self, session, now=None):
+        # 回傳 0 = 可以執行這次 rerun (扣除一次)；否則為距離下一次可執行的秒數 (不扣除)
+        if self.rerun_rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(session)
+            if bucket is None:
+                bucket = self._buckets[session] = [float(self.rerun_burst), now]
+            tokens = min(self.rerun_burst, bucket[0] + (now - bucket[1]) * self.rerun_rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return 0.0
+            bucket[0] = tokens
+        metrics.count("sa_reruns_throttled_total")
+        return (1 - tokens) / self.rerun_rate
+
+    def _expire(self, now):
+        # 作答中：依最後活動排序，只需檢查開頭；等候室：每秒最多掃描一次
+        expired = 0
+        while self._active:
+            session, seen = next(iter(self._active.items()))
+            if now - seen < self.idle_seconds:
+                break
+            del self._active[session]
+            self._buckets.pop(session, None)
+            self._idle[session] = now
+            expired += 1
+        if expired:
+            metrics.count("sa_sessions_expired_total", expired)
+            while len(self._idle) > self.max_idle_entries:
+                self._idle.popitem(last=False)
+        if now >= self._next_sweep:
+            self._next_sweep = now + 1.0
+            for session in [s for s, seen in self._waiting.items() if now - seen >= self.waiting_timeout]:
+                del self._waiting[session]
+
+    def _publish(self):
+        metrics.gauge("sa_sessions_active", len(self._active))
+        metrics.gauge("sa_sessions_waiting", len(self._waiting))
@@ -0,0 +1,243 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from charts import add_workbook_charts, heat_cells, radar_frame
+from ingest import discover, parse_files
+from results import STATUS_NAMES
+from scoring import FRAMEWORK_LABELS, FRAMEWORK_SECTIONS, FRAMEWORKS, SALIENCE, SCALE, heatmap, stakeholder_salience
+from storage import ResponseStore
+
+# =================================================================================================
+# 跨填答者彙總 (組織層級重大性矩陣)
+# 來源：ResponseStore (SQLite) 或既有的 <Name>_<Department>_Result.xlsx 資料夾
+# 所有來源先轉成同一個長表格 (respondent, name, department, section, topic, metric, value)，
+# 之後以 pandas groupby 向量化計算各議題 × 部門的平均數 / 中位數
+# =================================================================================================
+
+LONG_COLUMNS = ["respondent", "name", "department", "section", "topic", "metric", "value"]
+
+# 各 section 的綜合分數 = 兩個指標相乘
+PRODUCT_SCORES = {
+    "materiality": {
+        "Opp Score": ("Opp Value Creation", "Opp Probability"),
+        "Risk Score": ("Risk Impact", "Risk Probability"),
+    },
+    "tcfd_opp": {"Score": ("Severity/Value", "Likelihood")},
+    "tcfd_risk": {"Score": ("Severity/Value", "Likelihood")},
+    "hrdd": {"Score": ("Severity", "Probability")},
+}
+
+ALL_DEPARTMENTS = "(All)"
+UNKNOWN_DEPARTMENT = "(Unknown)"
+
+
+# --- 載入 ---
+def _long_frame(records):
+    df = pd.DataFrame.from_records(records, columns=LONG_COLUMNS)
+    df["department"] = df["department"].fillna(UNKNOWN_DEPARTMENT)
+    for col in ("respondent", "name", "department", "section", "topic", "metric"):
+        df[col] = df[col].astype("category")
+    df["value"] = df["value"].astype(np.int16)
+    return df
+
+
+def load_from_store(store, campaign=None):
+    return _long_frame([
+        (respondent, name, department, section, topic, metric, value)
+        for _, respondent, name, department, section, topic, metric, value in store.read_scores(campaign)
+    ])
+
+
+def load_from_directory(directory, pattern_suffix="_Result.xlsx", workers=None, log=sys.stderr):
+    # 與 ingest.py 共用有上限的 process pool 平行解析 (不依題庫驗證)；無法讀取的檔案略過
+    records = []
+    for path, user_info, rows, error in parse_files(discover(directory, pattern_suffix), workers, catalog_path=None):
+        if error is not None:
+            print(f"SKIP {path}: {error}", file=log)
+            continue
+        respondent = os.path.splitext(os.path.basename(path))[0]
+        name, department = user_info.get("Name"), user_info.get("Department")
+        records.extend((respondent, name, department) + row for row in rows)
+    return _long_frame(records)
+
+
+# --- 計算 ---
+def wide_scores(long_df, section):
+    # 長表格 -> 每列一個 (填答者, 議題)，欄位為各指標，並加上綜合分數
+    part = long_df[long_df["section"] == section]
+    wide = part.set_index(["respondent", "department", "topic", "metric"])["value"].unstack("metric")
+    # metric 為 categorical，其他 section 的指標會成為全空欄位
+    wide = wide.dropna(axis=1, how="all").reset_index()
+    wide.columns.name = None
+    for score, (a, b) in PRODUCT_SCORES.get(section, {}).items():
+        wide[score] = wide[a].to_numpy(dtype=np.float64) * wide[b].to_numpy(dtype=np.float64)
+    return wide
+
+
+def summarize(wide, value_columns):
+    # 各議題 × 部門，以及全組織 (All) 的 mean / median / 填答人數
+    stats = {col: ["mean", "median"] for col in value_columns}
+    by_dept = wide.groupby(["topic", "department"], observed=True).agg(stats)
+    overall = wide.groupby("topic", observed=True).agg(stats)
+    overall.index = pd.MultiIndex.from_arrays(
+        [overall.index, [ALL_DEPARTMENTS] * len(overall)], names=["topic", "department"]
+    )
+    counts = pd.concat([
+        wide.groupby(["topic", "department"], observed=True).size(),
+        wide.groupby("topic", observed=True).size().set_axis(overall.index),
+    ])
+    result = pd.concat([overall, by_dept])
+    result.columns = [f"{col} ({stat})" for col, stat in result.columns]
+    result.insert(0, "Respondents", counts.reindex(result.index).to_numpy())
+    return result.reset_index().rename(columns={"topic": "Topic", "department": "Department"})
+
+
+def heatmaps(wides):
+    # 各框架的 5×5 熱度圖 (列 = 第一軸分數，欄 = 第二軸分數)，所有填答者 × 議題一次 bincount
+    frames = []
+    for framework, (_, _, _, _, axes) in FRAMEWORKS.items():
+        wide = wides.get(FRAMEWORK_SECTIONS[framework])
+        if wide is None:
+            continue
+        counts = heatmap(wide[axes[0]].to_numpy(dtype=np.uint8), wide[axes[1]].to_numpy(dtype=np.uint8))
+        frame = pd.DataFrame(counts, columns=[str(v) for v in range(1, SCALE + 1)])
+        frame.insert(0, "Row Score", range(1, SCALE + 1))
+        frame.insert(0, "Column Axis", axes[1])
+        frame.insert(0, "Row Axis", axes[0])
+        frame.insert(0, "Framework", FRAMEWORK_LABELS[framework])
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def aggregate(long_df):
+    tables = {}
+    wides = {}
+    if long_df.empty:
+        return tables
+
+    respondents = long_df.groupby("department", observed=True)["respondent"].nunique()
+    tables["Respondents"] = respondents.rename("Respondents").rename_axis("Department").reset_index()
+
+    if (long_df["section"] == "stakeholder").any():
+        wide = wide_scores(long_df, "stakeholder")
+        metrics = [c for c in wide.columns if c not in ("respondent", "department", "topic")]
+        # 每位填答者對每個利害關係人的顯著性 (5 個欄位的平均，見 scoring.stakeholder_salience)
+        wide[SALIENCE] = stakeholder_salience(wide[metrics].to_numpy(dtype=np.float32))
+        tables["Stakeholder"] = summarize(wide, [SALIENCE] + metrics)
+
+    if (long_df["section"] == "materiality").any():
+        wide = wides["materiality"] = wide_scores(long_df, "materiality")
+        table = summarize(wide, ["Opp Score", "Risk Score", "Opp Value Creation", "Opp Probability",
+                                 "Risk Impact", "Risk Probability"])
+        # 議題被選入前 10 大的比例 / 已發生 (Actual) 比例
+        total = long_df["respondent"].nunique()
+        selected = wide.groupby("topic", observed=True)["respondent"].nunique()
+        actual = (wide["Status"] == 1).groupby(wide["topic"], observed=True).mean()
+        all_rows = table["Department"] == ALL_DEPARTMENTS
+        table.loc[all_rows, "Selection Rate"] = table.loc[all_rows, "Topic"].map(selected / total).to_numpy()
+        table.loc[all_rows, f"{STATUS_NAMES[1]} Rate"] = table.loc[all_rows, "Topic"].map(actual).to_numpy()
+        tables["Materiality"] = table
+
+    for section in ("tcfd_opp", "tcfd_risk"):
+        if (long_df["section"] == section).any():
+            wides[section] = wide_scores(long_df, section)
+    tcfd = [wides[s].assign(Type=t) for s, t in (("tcfd_opp", "Opportunity"), ("tcfd_risk", "Risk")) if s in wides]
+    if tcfd:
+        tables["TCFD"] = pd.concat(
+            [summarize(w, ["Score", "Severity/Value", "Likelihood"]).assign(Type=w["Type"].iat[0]) for w in tcfd],
+            ignore_index=True,
+        )
+
+    if (long_df["section"] == "hrdd").any():
+        wide = wides["hrdd"] = wide_scores(long_df, "hrdd")
+        table = summarize(wide, ["Score", "Severity", "Probability"])
+        chain = wide.groupby("topic", observed=True)[["Supplier (Value Chain)", "Customer (Value Chain)"]].mean()
+        all_rows = table["Department"] == ALL_DEPARTMENTS
+        for col in chain.columns:
+            table.loc[all_rows, f"{col} Rate"] = table.loc[all_rows, "Topic"].map(chain[col]).to_numpy()
+        tables["HRDD"] = table
+
+    heat = heatmaps(wides)
+    if heat is not None:
+        tables["Heat Map"] = heat
+    return tables
+
+
+def chart_data(tables):
+    # 彙總表 -> 圖表資料 (欄位與 charts.record_chart_data 相同，使用全組織 (All) 的平均數)
+    def overall(name):
+        table = tables.get(name)
+        return None if table is None else table[table["Department"] == ALL_DEPARTMENTS]
+
+    data = {}
+    mat = overall("Materiality")
+    if mat is not None:
+        data["materiality"] = pd.DataFrame({
+            "Topic": mat["Topic"].astype(str),
+            "Opp Score": mat["Opp Score (mean)"],
+            "Risk Score": mat["Risk Score (mean)"],
+            "Status": np.where(mat[f"{STATUS_NAMES[1]} Rate"] >= 0.5, STATUS_NAMES[1], STATUS_NAMES[2]),
+        })
+    tcfd = overall("TCFD")
+    if tcfd is not None:
+        data["tcfd"] = pd.DataFrame({
+            "Type": tcfd["Type"],
+            "Topic": tcfd["Topic"].astype(str),
+            "Severity/Value": tcfd["Severity/Value (mean)"],
+            "Likelihood": tcfd["Likelihood (mean)"],
+            "Score": tcfd["Score (mean)"],
+        })
+    heat = tables.get("Heat Map")
+    if heat is not None and (heat["Framework"] == FRAMEWORK_LABELS["hrdd"]).any():
+        hrdd = heat[heat["Framework"] == FRAMEWORK_LABELS["hrdd"]]
+        data["hrdd"] = heat_cells(hrdd[[str(v) for v in range(1, SCALE + 1)]].to_numpy())
+    sh = overall("Stakeholder")
+    if sh is not None:
+        means = [c for c in sh.columns if c.endswith(" (mean)") and c != f"{SALIENCE} (mean)"]
+        frame = sh.set_index(sh["Topic"].astype(str))[means]
+        frame.columns = [c[:-len(" (mean)")] for c in means]
+        data["stakeholder"] = radar_frame(frame)
+    return data
+
+
+def write_report(tables, path):
+    with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+        for sheet_name, table in tables.items():
+            table.to_excel(writer, sheet_name=sheet_name, index=False)
+        if tables:
+            add_workbook_charts(writer.book, chart_data(tables))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate assessment results into an organisation-level workbook.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="SQLite response store (see storage.py)")
+    source.add_argument("--dir", help="directory of <Name>_<Department>_Result.xlsx files")
+    parser.add_argument("--campaign", help="only aggregate this campaign (with --db)")
+    parser.add_argument("--workers", type=int, help="parser processes for --dir (default: CPU count)")
+    parser.add_argument("-o", "--output", default="Organisation_Result.xlsx")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.db:
+        store = ResponseStore(args.db)
+        long_df = load_from_store(store, args.campaign)
+        store.close()
+    else:
+        long_df = load_from_directory(args.dir, workers=args.workers)
+    loaded = time.perf_counter()
+    tables = aggregate(long_df)
+    write_report(tables, args.output)
+    print(
+        f"{long_df['respondent'].nunique()} respondents, {len(long_df)} scores: "
+        f"load {loaded - started:.2f}s, aggregate + write {time.perf_counter() - loaded:.2f}s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import argparse
+import hmac
+import json
+import logging
+import os
+import threading
+import uuid
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+import config
+from campaigns import CAMPAIGNS_PATH, CampaignError, load_campaigns
+from catalog import LANGUAGES, Catalog, load_catalog_data
+from idempotency import content_digest
+from results import HRDD_CHAIN_METRICS, HRDD_METRICS, MAT_METRICS, STATUS_CODES, STEP_SECTIONS, TCFD_METRICS, batch_rows, get_layout
+from storage import ResponseStore, StoreQueueFull
+from validation import ERRORS, validate_batch
+
+# =================================================================================================
+# 批次提交 API (不經過 Streamlit 介面)
+# 工作坊等集中收集的作答以 JSON 直接寫入結果資料庫，題庫、活動設定與作答規則與 app.py 相同
+#   POST /submissions[?campaign=<代碼>]  單筆物件、物件陣列，或 {"campaign": ..., "submissions": [...]}
+#   GET  /healthz
+# 每筆提交 (議題以題庫代碼為鍵，分數為 1-5)：
+#   {"respondent": 選填 (預設產生新 ID；相同 ID 重新提交會取代該填答者的結果),
+#    "name": ..., "department": ..., "language": "zh" | "en",
+#    "stakeholder": [[...], ...]                         利害關係人 × 欄位，順序同題庫
+#    "materiality": {代碼: [status, ov, op, ri, rp]}      正好 10 個議題；status 為 "Actual" / "Potential"
+#    "tcfd_opp": {代碼: [value, likelihood]}, "tcfd_risk": {代碼: [severity, likelihood]}
+#    "hrdd": {代碼: [severity, probability, supplier, customer]}  supplier / customer 為 0 / 1}
+# 只需提供活動啟用的步驟。回應依提交順序列出 accepted / rejected (附錯誤訊息)，不合格的提交不影響同批其他提交
+# 重送：與同一填答者上一次提交內容完全相同的提交回報 duplicate，不再寫入 (見 idempotency.py)
+# 效能：JSON 解析後每個步驟整批堆成一個陣列，規則 (validation.py) 與長表格 (results.batch_rows) 都以向量運算
+# 一次處理整批；寫入交給 ResponseStore 的背景執行緒，整批只佔兩個佇列項目
+# 啟動：python api.py [--host 127.0.0.1] [--port 8601]
+# =================================================================================================
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionError(ValueError):
+    pass
+
+
+# --- 活動與題庫 (設定檔更新後以新的 mtime 重新載入) ---
+@lru_cache(maxsize=4)
+def _load_registry(path, mtime_ns):
+    return load_campaigns(path)
+
+
+@lru_cache(maxsize=16)
+def _load_layout(path, mtime_ns, company):
+    return get_layout(Catalog(load_catalog_data(path), dict(company)))
+
+
+def resolve_campaign(key, path=CAMPAIGNS_PATH):
+    mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    campaign = _load_registry(path, mtime_ns).get(key or config.CAMPAIGN)
+    company = tuple(sorted(campaign.tenant.company.items()))
+    return campaign, _load_layout(campaign.catalog_path, os.stat(campaign.catalog_path).st_mtime_ns, company)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path):
+    # 每個租戶資料庫一個 ResponseStore (與 app.py 的 get_response_store 相同)
+    if not db_path:
+        return None
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = ResponseStore(
+                db_path, pool_size=config.DB_POOL_SIZE, dedupe_entries=config.DEDUPE_ENTRIES
+            )
+        return store
+
+
+# --- 解析 ---
+def _keyed(values, keys, section, width):
+    # {代碼: [...]} -> 依題庫順序的列；未提供的議題為 0 (由規則判定為未作答)
+    if not isinstance(values, dict):
+        raise SubmissionError(f"{section}: expected an object keyed by topic code")
+    unknown = values.keys() - set(keys)
+    if unknown:
+        raise SubmissionError(f"{section}: unknown topic code {sorted(unknown)[0]!r}")
+    zeros = [0] * width
+    return [values.get(key, zeros) for key in keys]
+
+
+def _materiality(values, layout):
+    # 只有選入的議題需要轉換 Status ("Actual" / "Potential" -> 代碼)
+    # 其他型別 (數字以外的非字串、巢狀 list) 原樣保留，由 _stack 判定為格式錯誤
+    rows = _keyed(values, layout.mat_keys, "materiality", len(MAT_METRICS))
+    for key, row in values.items():
+        if isinstance(row, list) and row and isinstance(row[0], str):
+            if row[0] not in STATUS_CODES:
+                raise SubmissionError(f"materiality: status of {key!r} must be one of {list(STATUS_CODES)}")
+            rows[layout.mat_index[key]] = [STATUS_CODES[row[0]], *row[1:]]
+    return rows
+
+
+def _text(sub, field, required=True):
+    value = sub.get(field)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or not value.strip():
+        raise SubmissionError(f"{field} must be a non-empty string")
+    return value
+
+
+def parse_submission(sub, layout, steps):
+    # 回傳 ((respondent, name, department, language), 步驟 -> 巢狀 list)
+    if not isinstance(sub, dict):
+        raise SubmissionError("submission must be a JSON object")
+    # 每個欄位都先檢查型別：任何一筆的錯誤只會讓該筆被拒絕，不影響同批其他提交
+    language = sub.get("language", LANGUAGES[-1])
+    if not isinstance(language, str) or language not in LANGUAGES:
+        raise SubmissionError(f"language must be one of {list(LANGUAGES)}")
+    respondent = _text(sub, "respondent", required=False) or uuid.uuid4().hex
+    # 與填答介面相同：姓名與部門必填
+    name, department = _text(sub, "name"), _text(sub, "department")
+    answers = {}
+    if "stakeholder" in steps:
+        answers["stakeholder"] = sub.get("stakeholder")
+    if "materiality" in steps:
+        answers["materiality"] = _materiality(sub.get("materiality"), layout)
+    if "tcfd" in steps:
+        n = layout.n_tcfd_opp
+        keys = [key for _, key in layout.tcfd_keys]
+        answers["tcfd"] = (
+            _keyed(sub.get("tcfd_opp"), keys[:n], "tcfd_opp", len(TCFD_METRICS))
+            + _keyed(sub.get("tcfd_risk"), keys[n:], "tcfd_risk", len(TCFD_METRICS))
+        )
+    if "hrdd" in steps:
+        answers["hrdd"] = _keyed(sub.get("hrdd"), layout.hrdd_keys, "hrdd", len(HRDD_METRICS + HRDD_CHAIN_METRICS))
+    return (respondent, name, department, language), answers
+
+
+def _stack(values, shape):
+    # 整批轉成 (n, *shape) float 陣列；形狀不符或非數字的提交在 bad 中標記 (只在整批轉換失敗時逐筆檢查)
+    # 只接受 JSON 數字：字串 ("3")、布林值、null 不會被轉換成分數
+    arr = _numeric(values)
+    if arr is not None and arr.shape == (len(values), *shape):
+        return arr, np.zeros(len(values), dtype=bool)
+    arr = np.zeros((len(values), *shape))
+    bad = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        item = _numeric(value)
+        if item is None or item.shape != shape:
+            bad[i] = True
+        else:
+            arr[i] = item
+    return arr, bad
+
+
+def _numeric(value):
+    try:
+        arr = np.array(value)
+    except (TypeError, ValueError):
+        return None
+    if arr.dtype.kind not in "iuf":
+        return None
+    return arr.astype(np.float64)
+
+
+# --- 批次處理 ---
+def process_batch(submissions, campaign, layout, store):
+    results = [None] * len(submissions)
+    steps = campaign.steps
+    shapes = layout.shapes()
+    shapes["hrdd"] = (len(layout.hrdd_keys), len(HRDD_METRICS + HRDD_CHAIN_METRICS))
+
+    respondents, answers, index, seen = [], {step: [] for step in steps}, [], set()
+    for i, sub in enumerate(submissions):
+        try:
+            respondent, parsed = parse_submission(sub, layout, steps)
+            if respondent[0] in seen:
+                raise SubmissionError(f"respondent {respondent[0]!r} appears more than once in this batch")
+        except (TypeError, ValueError) as exc:
+            # SubmissionError 為預期的格式錯誤；其他型別錯誤同樣只拒絕這一筆
+            message = str(exc) if isinstance(exc, SubmissionError) else f"invalid submission: {exc}"
+            results[i] = {"index": i, "status": "rejected", "errors": [message]}
+            continue
+        seen.add(respondent[0])
+        respondents.append(respondent)
+        index.append(i)
+        for step in steps:
+            answers[step].append(parsed[step])
+
+    batch, malformed, errors = {}, {}, [[] for _ in index]
+    for step in steps:
+        batch[step], malformed[step] = _stack(answers[step], shapes[step])
+        for j in np.flatnonzero(malformed[step]):
+            errors[j].append(f"{step}: expected {' x '.join(map(str, shapes[step]))} numeric values")
+    # 錯誤代碼以步驟名稱開頭；形狀不符的步驟不再重複回報規則錯誤
+    for code, failed in validate_batch(batch, steps).items():
+        for j in np.flatnonzero(failed & ~malformed[code.split("_")[0]]):
+            errors[j].append(ERRORS[code])
+
+    ok = np.array([not e for e in errors], dtype=bool)
+    for j, i in enumerate(index):
+        if errors[j]:
+            results[i] = {"index": i, "respondent": respondents[j][0], "status": "rejected", "errors": errors[j]}
+        elif store is not None and not store.dedupe.admit(
+            (campaign.key, respondents[j][0], "api"), submission_digest(layout, steps, batch, j, respondents[j])
+        ):
+            # 與該填答者上一次提交的內容完全相同 (用戶端重送)：回報 duplicate，不再寫入
+            ok[j] = False
+            results[i] = {"index": i, "respondent": respondents[j][0], "status": "duplicate"}
+        else:
+            results[i] = {"index": i, "respondent": respondents[j][0], "status": "accepted"}
+    if ok.any() and store is not None:
+        accepted = [respondent for respondent, keep in zip(respondents, ok) if keep]
+        store.submit_many(campaign.key, accepted, accepted_rows(layout, steps, batch, ok, accepted), replace_sections=[
+            section for step in steps for section in STEP_SECTIONS[step]
+        ])
+    return results
+
+
+def submission_digest(layout, steps, batch, j, respondent):
+    # 基本資料 + 各步驟的作答陣列；同一份題庫與相同內容必得到相同的雜湊
+    return content_digest(
+        layout.version, json.dumps(respondent[1:]), *(batch[step][j].tobytes() for step in steps)
+    )
+
+
+def accepted_rows(layout, steps, batch, ok, respondents):
+    # 與 ResponseRecord.rows 相同的長表格 (多一個 respondent 欄)
+    ids = [respondent for respondent, *_ in respondents]
+    rows = []
+    if "stakeholder" in steps:
+        rows += batch_rows("stakeholder", ids, layout.sh_rows, layout.sh_cols, batch["stakeholder"][ok])
+    if "materiality" in steps:
+        mat = batch["materiality"][ok]
+        rows += batch_rows("materiality", ids, layout.mat_titles, MAT_METRICS, mat, mask=mat[..., 0] != 0)
+    if "tcfd" in steps:
+        n = layout.n_tcfd_opp
+        tcfd = batch["tcfd"][ok]
+        rows += batch_rows("tcfd_opp", ids, layout.tcfd_titles[:n], TCFD_METRICS, tcfd[:, :n])
+        rows += batch_rows("tcfd_risk", ids, layout.tcfd_titles[n:], TCFD_METRICS, tcfd[:, n:])
+    if "hrdd" in steps:
+        rows += batch_rows("hrdd", ids, layout.hrdd_titles, HRDD_METRICS + HRDD_CHAIN_METRICS, batch["hrdd"][ok])
+    return rows
+
+
+# --- HTTP ---
+class SubmissionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/healthz":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"status": "ok"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/submissions":
+            self._reply(404, {"error": "not found"})
+            return
+        if config.API_TOKEN and not hmac.compare_digest(
+            self.headers.get("Authorization", ""), f"Bearer {config.API_TOKEN}"
+        ):
+            self._reply(401, {"error": "unauthorized"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # 無法得知 body 長度，讀取位置已不可靠：回覆後關閉連線
+            self.close_connection = True
+            self._reply(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY_BYTES:
+            self._reply(413, {"error": f"request body exceeds {MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+
+        campaign_key = parse_qs(url.query).get("campaign", [None])[0]
+        if isinstance(body, dict) and "submissions" in body:
+            campaign_key = body.get("campaign", campaign_key)
+            submissions = body["submissions"]
+        else:
+            submissions = body if isinstance(body, list) else [body]
+        if campaign_key is not None and not isinstance(campaign_key, str):
+            self._reply(400, {"error": "'campaign' must be a string"})
+            return
+        if not isinstance(submissions, list):
+            self._reply(400, {"error": "'submissions' must be an array"})
+            return
+        if len(submissions) > config.API_MAX_BATCH:
+            self._reply(413, {"error": f"at most {config.API_MAX_BATCH} submissions per request"})
+            return
+        try:
+            campaign, layout = resolve_campaign(campaign_key)
+        except CampaignError as exc:
+            self._reply(404, {"error": str(exc)})
+            return
+
+        try:
+            results = process_batch(submissions, campaign, layout, get_store(campaign.tenant.db_path))
+        except StoreQueueFull:
+            # 寫入佇列已滿：整批都不算寫入 (去重紀錄已清除)，用戶端稍後重送同一批即可
+            self._reply(503, {"error": "the response store is busy, retry later"})
+            return
+        counts = {status: 0 for status in ("accepted", "duplicate", "rejected")}
+        for result in results:
+            counts[result["status"]] += 1
+        self._reply(200, {"campaign": campaign.key, **counts, "results": results})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(host=config.API_HOST, port=config.API_PORT):
+    server = ThreadingHTTPServer((host, port), SubmissionHandler)
+    server.daemon_threads = True
+    logger.info("Submission API listening on http://%s:%d", host, server.server_port)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless JSON submission API")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--port", type=int, default=config.API_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = serve(args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for store in _stores.values():
+            store.close()
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aggregate  # noqa: E402
+import config  # noqa: E402
+from benchmarks.loadtest import git_commit  # noqa: E402
+from catalog import Catalog, load_catalog_data  # noqa: E402
+from reports import build_workbook  # noqa: E402
+from results import STEPS, ResponseRecord, get_layout  # noqa: E402
+from storage import ResponseStore  # noqa: E402
+
+# =================================================================================================
+# 彙總測試：產生 N 位填答者的隨機作答，量測 aggregate.py 的載入 / 彙總 / 寫出時間 (目標：10k 位填答者數秒內完成)
+# - db  : 先寫入暫存的 ResponseStore，再 load_from_store (不計入寫入時間)
+# - dir : 先產生 <Name>_<Department>_Result.xlsx 資料夾，再 load_from_directory (與 ingest.py 共用 process pool)
+#         只產生 --templates 份不同的活頁簿，其餘以複製檔案補足 N 個 (解析成本相同，準備資料較快)
+# 用法：python benchmarks/aggregation.py [-n 10000] [--source db|dir|both] [--workers 4] [-o result.json]
+# =================================================================================================
+
+DEPARTMENTS = ("IT", "HR", "Finance", "Operations", "Sales", "Legal")
+MATERIAL_TOPICS = 10
+
+
+def random_record(layout, rng):
+    record = ResponseRecord(layout)
+    record.stakeholder[:] = rng.integers(1, 6, record.stakeholder.shape)
+    selected = rng.choice(len(layout.mat_keys), MATERIAL_TOPICS, replace=False)
+    record.materiality[selected, 0] = rng.integers(1, 3, MATERIAL_TOPICS)
+    record.materiality[selected, 1:] = rng.integers(1, 6, (MATERIAL_TOPICS, record.materiality.shape[1] - 1))
+    record.tcfd[:] = rng.integers(1, 6, record.tcfd.shape)
+    record.hrdd[:] = rng.integers(1, 6, record.hrdd.shape)
+    record.set_hrdd_chain(rng.integers(0, 2, (len(layout.hrdd_keys), 2)))
+    return record
+
+
+def respondents(layout, n, seed):
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        yield f"bench-{i:06d}", f"P{i}", DEPARTMENTS[i % len(DEPARTMENTS)], random_record(layout, rng)
+
+
+def prepare_store(layout, n, path, seed, chunk=500):
+    store = ResponseStore(path)
+    try:
+        infos, rows = [], []
+        for rid, name, department, record in respondents(layout, n, seed):
+            infos.append((rid, name, department, "en"))
+            rows.extend((rid,) + row for step in STEPS for row in record.rows(step))
+            if len(infos) >= chunk:
+                store.submit_many(config.CAMPAIGN, infos, rows)
+                store.flush()
+                infos, rows = [], []
+        if infos:
+            store.submit_many(config.CAMPAIGN, infos, rows)
+        store.flush()
+    finally:
+        store.close()
+
+
+def prepare_directory(layout, n, directory, seed, templates):
+    written = []
+    for i, (_, name, department, record) in enumerate(respondents(layout, n, seed)):
+        path = os.path.join(directory, f"{name}_{department}_Result.xlsx")
+        if i < templates:
+            with open(path, "wb") as f:
+                f.write(build_workbook(record.to_frames(), {"Name": name, "Department": department}))
+            written.append(path)
+        else:
+            shutil.copyfile(written[i % templates], path)
+
+
+def measure(load):
+    started = time.perf_counter()
+    long_df = load()
+    loaded = time.perf_counter()
+    tables = aggregate.aggregate(long_df)
+    aggregated = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        aggregate.write_report(tables, os.path.join(tmp, "Organisation_Result.xlsx"))
+    written = time.perf_counter()
+    return {
+        "respondents": int(long_df["respondent"].nunique()),
+        "scores": len(long_df),
+        "load_s": loaded - started,
+        "aggregate_s": aggregated - loaded,
+        "write_s": written - aggregated,
+        "total_s": written - started,
+    }
+
+
+def run_benchmark(n, sources, workers=None, templates=50, seed=0):
+    layout = get_layout(Catalog(load_catalog_data(), config.DEFAULT_COMPANY))
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "respondents": n,
+            "workers": workers or os.cpu_count(),
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        if "db" in sources:
+            path = os.path.join(tmp, "responses.db")
+            prepare_store(layout, n, path, seed)
+
+            def load_db():
+                store = ResponseStore(path)
+                try:
+                    return aggregate.load_from_store(store, config.CAMPAIGN)
+                finally:
+                    store.close()
+
+            result["db"] = measure(load_db)
+        if "dir" in sources:
+            directory = os.path.join(tmp, "workbooks")
+            os.makedirs(directory)
+            prepare_directory(layout, n, directory, seed, templates)
+            result["dir"] = measure(lambda: aggregate.load_from_directory(directory, workers=workers, log=sys.stderr))
+    return result
+
+
+def print_report(result):
+    meta = result["meta"]
+    print(f"{meta['respondents']} respondents ({meta['workers']} parser processes for dir)")
+    for source in ("db", "dir"):
+        stats = result.get(source)
+        if stats is None:
+            continue
+        print(
+            f"  {source:<4} {stats['scores']} scores: load {stats['load_s']:.2f}s, aggregate {stats['aggregate_s']:.2f}s, "
+            f"write {stats['write_s']:.2f}s, total {stats['total_s']:.2f}s"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time aggregate.py on N synthetic respondents.")
+    parser.add_argument("-n", "--respondents", type=int, default=10000)
+    parser.add_argument("--source", choices=("db", "dir", "both"), default="db")
+    parser.add_argument("--workers", type=int, help="parser processes for --source dir (default: CPU count)")
+    parser.add_argument("--templates", type=int, default=50, help="distinct workbooks generated for --source dir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    sources = ("db", "dir") if args.source == "both" else (args.source,)
+    result = run_benchmark(args.respondents, sources, args.workers, args.templates, args.seed)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"-> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
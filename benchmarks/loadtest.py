@@ -0,0 +1,388 @@
+import argparse
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+
+# =================================================================================================
+# 壓力測試：以 Streamlit AppTest (headless) 模擬 N 位填答者走完整個流程
+#   語言 -> 基本資料 -> Stakeholder -> Materiality (選題 / 評分) -> TCFD -> HRDD -> 完成頁
+# - 每位填答者的作答值隨機 (固定 seed 可重現)，多個 worker process 同時執行
+# - 記錄每個步驟每次 rerun 的延遲、產生 Excel 報告的時間，以及記憶體：
+#   worker peak RSS (ru_maxrss，worker process 執行過的所有 session 累計的最高值) 與
+#   每個 session 前後的 RSS 增量 (目前 RSS 的差值，只在 Linux 上可用)
+# - 入場控制與報告產生預設與正式環境相同 (SA_MAX_SESSIONS / SA_RERUN_RATE / SA_JOB_EXECUTOR 或其預設值)，
+#   可用 --max-sessions / --rerun-rate / --job-executor 改變；被 rerun 速率限制擋下時，模擬的填答者
+#   等到頁面恢復後重做同一個操作，另外記錄被擋下的次數與等待時間 (不計入各步驟的延遲)
+# - 結果存成 JSON，可用 --compare 與先前的結果比較 (例如不同 commit)
+# 用法：python benchmarks/loadtest.py -n 40 -c 4 [--mode batched] [--per-widget] [--rerun-rate 0] [-o result.json]
+# =================================================================================================
+
+APP_PATH = os.path.join(ROOT, "app.py")
+STEP_NAMES = ("language", "info", "stakeholder", "materiality_select", "materiality", "tcfd", "hrdd", "finish")
+PERCENTILES = (50, 95, 99)
+
+_ui = None
+_mat_keys = None
+_main_module = None
+
+
+def _init_worker(mode, db_dir, max_sessions, rerun_rate, job_executor):
+    # config 於 import 時讀取環境變數，必須在 worker 載入 app 前設定
+    global _ui, _mat_keys, _main_module
+    _main_module = sys.modules["__main__"]
+    os.environ["SA_INPUT_MODE"] = mode
+    os.environ["SA_DB_PATH"] = os.path.join(db_dir, "loadtest.db") if db_dir else ""
+    os.environ["SA_DRAFT_DEBOUNCE"] = "0"
+    os.environ["SA_MAX_SESSIONS"] = str(max_sessions)
+    os.environ["SA_RERUN_RATE"] = str(rerun_rate)
+    os.environ["SA_JOB_EXECUTOR"] = job_executor
+    # config 已在主 process 載入 (參數預設值)，worker 重新載入以套用上面的設定
+    import importlib
+
+    importlib.reload(config)
+    # app 的 JobQueue 由 st.cache_resource 持有，不會被 shutdown；worker process 結束時會等待所有子 process，
+    # 報告工作的 process pool (--job-executor process) 不先結束的話，整個壓測會卡在關閉 worker
+    multiprocessing.util.Finalize(None, _stop_children, exitpriority=10)
+    from catalog import CATALOG_PATH, load_catalog_data
+
+    data = load_catalog_data(CATALOG_PATH)
+    _ui = data["ui_texts"]
+    _mat_keys = list(data["topics"]["materiality"])
+
+
+def _stop_children():
+    for child in multiprocessing.active_children():
+        child.terminate()
+        child.join()
+
+
+def _peak_rss_mb():
+    # Linux 的 ru_maxrss 單位為 KB；整個 worker process 的最高值，不是單一 session
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _current_rss_mb():
+    # /proc/self/statm 第二欄為目前常駐的 page 數；其他平台回傳 None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Session:
+    def __init__(self, seed, per_widget):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = np.random.default_rng(seed)
+        self.per_widget = per_widget
+        self.lang = ("zh", "en")[int(self.rng.integers(2))]
+        self.latencies = {name: [] for name in STEP_NAMES}
+        self.throttled = 0
+        self.throttle_wait_s = 0.0
+        self.at = AppTest.from_file(APP_PATH, default_timeout=120)
+
+    def run(self, step, action=None, done=None):
+        # action：這次 rerun 之前的操作 (例如按下按鈕)，每次呼叫都重新查找元素 (rerun 後舊的元素已失效)
+        # 被 rerun 速率限制擋下時，等頁面恢復 (整頁重跑，也可能再被擋下) 後重做一次，與真人看到提示後相同
+        # done：操作是否已生效；按鈕處理後的 st.rerun() 才被擋下時不重做 (否則會在下一頁再按一次)
+        while True:
+            if action is not None:
+                action()
+            elapsed = self._rerun(step)
+            if elapsed is not None:
+                self.latencies[step].append(elapsed)
+                return
+            while self._rerun(step) is None:
+                pass
+            if done is not None and done():
+                return
+
+    def _rerun(self, step):
+        # 回傳這次 rerun 的毫秒數；被擋下時等到可恢復的時間並回傳 None
+        before = self._throttled_until()
+        started = time.perf_counter()
+        self.at.run()
+        elapsed = (time.perf_counter() - started) * 1000
+        if self.at.exception:
+            raise RuntimeError(f"{step}: {self.at.exception[0].value}")
+        until = self._throttled_until()
+        if until == before:
+            return elapsed
+        self.throttled += 1
+        wait = max(until - time.time(), 0.0)
+        self.throttle_wait_s += wait
+        time.sleep(wait)
+        return None
+
+    def _throttled_until(self):
+        state = self.at.session_state
+        return state["throttled_until"] if "throttled_until" in state else None
+
+    def widget(self, kind, key):
+        return getattr(self.at, kind)(key=key)
+
+    def answer(self, step, widgets):
+        # widgets：(種類, key, 值)；live 模式 (--per-widget) 每改一個 widget 就 rerun 一次，模擬真人逐題作答
+        for kind, key, value in widgets:
+            if self.per_widget:
+                self.run(step, lambda: self.widget(kind, key).set_value(value))
+            else:
+                self.widget(kind, key).set_value(value)
+
+    def submit(self, step, label=None, state="step"):
+        # label：以按鈕文字查找 (沒有 key 的按鈕)；預設為「下一步」。state：按下後會改變的 session_state 值
+        before = self.at.session_state[state]
+
+        def click():
+            if label is None:
+                self.at.button(key="nav_next").click()
+            else:
+                next(b for b in self.at.button if b.label == label).click()
+
+        self.run(step, click, lambda: self.at.session_state[state] != before)
+
+    def score(self):
+        return int(self.rng.integers(1, 6))
+
+    def walk(self):
+        at = self.at
+        self.run("language")
+        at.radio[0].set_value(self.lang)
+        self.submit("language")
+
+        at.text_input[0].input(f"User {int(self.rng.integers(1_000_000))}")
+        at.text_input[1].input(("IT", "HR", "Finance", "Sales", "Legal")[int(self.rng.integers(5))])
+        self.submit("info")
+
+        self.answer("stakeholder", [("number_input", w.key, self.score()) for w in at.number_input if w.key.startswith("sh_")])
+        self.submit("stakeholder")
+
+        chosen = self.rng.choice(len(_mat_keys), size=10, replace=False)
+        self.answer("materiality_select", [("checkbox", f"mat_sel_{_mat_keys[i]}", True) for i in chosen])
+        self.submit("materiality_select", _ui[self.lang]["confirm_sel"], "selected_materiality_keys")
+
+        status_opts = _ui[self.lang]["status_opts"]
+        widgets = [("radio", w.key, status_opts[int(self.rng.integers(2))])
+                   for w in at.radio if w.key and w.key.startswith("mat_stat_")]
+        widgets += [("slider", w.key, self.score()) for w in at.slider if w.key and w.key.startswith("mat_")]
+        self.answer("materiality", widgets)
+        self.submit("materiality")
+
+        self.answer("tcfd", [("slider", w.key, self.score()) for w in at.slider if w.key and w.key.startswith("tcfd_")])
+        self.submit("tcfd")
+
+        widgets = [("select_slider", w.key, self.score()) for w in at.select_slider if w.key and w.key.startswith("hr_")]
+        sup = [w.key for w in at.checkbox if w.key and w.key.startswith("hr_sup_")]
+        cust = [w.key for w in at.checkbox if w.key and w.key.startswith("hr_cust_")]
+        for s, c in zip(sup, cust):
+            # 每個議題至少勾選一個價值鏈
+            flags = (True, bool(self.rng.integers(2))) if self.rng.integers(2) else (bool(self.rng.integers(2)), True)
+            widgets += [("checkbox", s, flags[0]), ("checkbox", c, flags[1])]
+        self.answer("hrdd", widgets)
+        self.submit("hrdd")
+        if at.session_state.step != 6:
+            raise RuntimeError(f"flow ended at step {at.session_state.step}")
+
+        # 完成頁重跑 (例如使用者捲動 / 切換圖表分頁)
+        self.run("finish")
+        return at.session_state.result, dict(at.session_state.user_info)
+
+
+def simulate(args):
+    seed, per_widget = args
+    from charts import record_chart_data
+    from reports import build_workbook
+
+    rss_before = _current_rss_mb()
+    started = time.perf_counter()
+    session = Session(seed, per_widget)
+    try:
+        record, user_info = session.walk()
+    except Exception as exc:
+        return {"seed": seed, "error": f"{type(exc).__name__}: {exc}"}
+    finally:
+        # AppTest 執行 app.py 時會替換 sys.modules["__main__"]，還原後 worker 才能反序列化下一個工作
+        sys.modules["__main__"] = _main_module
+    wall = time.perf_counter() - started
+
+    # 與背景報告工作相同的產生方式 (不經過報告快取，量測冷啟動時間)
+    t = time.perf_counter()
+    build_workbook(record.to_frames(), user_info, record_chart_data(record))
+    excel_ms = (time.perf_counter() - t) * 1000
+    rss_after = _current_rss_mb()
+    return {
+        "seed": seed,
+        "latencies": session.latencies,
+        "wall_s": wall,
+        "excel_ms": excel_ms,
+        "throttled": session.throttled,
+        "throttle_wait_s": session.throttle_wait_s,
+        "worker_peak_rss_mb": _peak_rss_mb(),
+        "session_rss_delta_mb": None if rss_before is None else rss_after - rss_before,
+        "pid": os.getpid(),
+    }
+
+
+def summarize(values):
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"count": 0}
+    summary = {"count": int(len(values)), "mean": float(values.mean()), "max": float(values.max())}
+    for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        summary[f"p{p}"] = float(v)
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_loadtest(n, concurrency, mode="live", per_widget=False, seed=0, persist=True,
+                 max_sessions=config.MAX_SESSIONS, rerun_rate=config.RERUN_RATE, job_executor=config.JOB_EXECUTOR):
+    seeds = [(seed + i, per_widget) for i in range(n)]
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as db_dir:
+        with ProcessPoolExecutor(
+            max_workers=concurrency, initializer=_init_worker,
+            initargs=(mode, db_dir if persist else None, max_sessions, rerun_rate, job_executor),
+        ) as pool:
+            sessions = list(pool.map(simulate, seeds))
+    elapsed = time.perf_counter() - started
+
+    ok = [s for s in sessions if "error" not in s]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "streamlit": _streamlit_version(),
+            "cpu_count": os.cpu_count(),
+            "respondents": n,
+            "concurrency": concurrency,
+            "mode": mode,
+            "per_widget": per_widget,
+            "persist": persist,
+            "max_sessions": max_sessions,
+            "rerun_rate": rerun_rate,
+            "job_executor": job_executor,
+            "seed": seed,
+        },
+        "elapsed_s": elapsed,
+        "throughput_per_min": len(ok) / elapsed * 60 if elapsed else 0.0,
+        "errors": [s for s in sessions if "error" in s],
+        "steps_ms": {name: summarize([v for s in ok for v in s["latencies"][name]]) for name in STEP_NAMES},
+        "session_wall_s": summarize([s["wall_s"] for s in ok]),
+        "generate_excel_ms": summarize([s["excel_ms"] for s in ok]),
+        "throttled_reruns": sum(s["throttled"] for s in ok),
+        "throttle_wait_s": summarize([s["throttle_wait_s"] for s in ok]),
+        # 每個 worker 取最後 (最高) 的值；session 增量只統計可量測的平台
+        "worker_peak_rss_mb": summarize(list({s["pid"]: s["worker_peak_rss_mb"] for s in ok}.values())),
+        "session_rss_delta_mb": summarize([s["session_rss_delta_mb"] for s in ok if s["session_rss_delta_mb"] is not None]),
+    }
+
+
+def _streamlit_version():
+    import streamlit
+
+    return streamlit.__version__
+
+
+def compare(result, baseline):
+    # 依 p95 比較各步驟 (正值 = 變慢)
+    lines = []
+    for name, stats in result["steps_ms"].items():
+        old = baseline.get("steps_ms", {}).get(name, {})
+        if "p95" in stats and old.get("p95"):
+            change = (stats["p95"] - old["p95"]) / old["p95"] * 100
+            lines.append(f"  {name:<20} p95 {old['p95']:8.1f} -> {stats['p95']:8.1f} ms ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+def print_report(result):
+    meta = result["meta"]
+    print(
+        f"{meta['respondents']} respondents, concurrency {meta['concurrency']}, mode {meta['mode']}"
+        f"{' (per-widget reruns)' if meta['per_widget'] else ''}: {result['elapsed_s']:.1f}s, "
+        f"{result['throughput_per_min']:.1f} completions/min, {len(result['errors'])} errors"
+    )
+    print(
+        f"  max sessions {meta['max_sessions'] or 'unlimited'}, rerun rate {meta['rerun_rate'] or 'unlimited'}/s, "
+        f"report jobs in {meta['job_executor']} pool"
+    )
+    print(f"  {'step':<20} {'reruns':>7} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for name, stats in result["steps_ms"].items():
+        if stats["count"]:
+            print(f"  {name:<20} {stats['count']:>7} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+    excel, rss, delta = result["generate_excel_ms"], result["worker_peak_rss_mb"], result["session_rss_delta_mb"]
+    if excel["count"]:
+        print(f"  generate_excel       p50 {excel['p50']:.1f} ms, p95 {excel['p95']:.1f} ms")
+        print(f"  worker peak RSS      p50 {rss['p50']:.0f} MB, max {rss['max']:.0f} MB ({rss['count']} workers)")
+    if delta["count"]:
+        print(f"  RSS growth / session p50 {delta['p50']:+.1f} MB, max {delta['max']:+.1f} MB")
+    if result["throttled_reruns"]:
+        wait = result["throttle_wait_s"]
+        print(
+            f"  throttled reruns     {result['throttled_reruns']} (not in step latencies), "
+            f"wait / session p50 {wait['p50']:.1f} s, max {wait['max']:.1f} s"
+        )
+    for error in result["errors"][:5]:
+        print(f"  ERROR seed {error['seed']}: {error['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless load test of the full assessment flow.")
+    parser.add_argument("-n", "--respondents", type=int, default=20)
+    parser.add_argument("-c", "--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--mode", choices=("live", "batched"), default="live", help="SA_INPUT_MODE for the app")
+    parser.add_argument("--per-widget", action="store_true", help="rerun after every widget change (live mode)")
+    parser.add_argument("--no-persist", action="store_true", help="run without the SQLite response store")
+    parser.add_argument("--max-sessions", type=int, default=config.MAX_SESSIONS,
+                        help="SA_MAX_SESSIONS for the app, 0 = no waiting room (default: %(default)s)")
+    parser.add_argument("--rerun-rate", type=float, default=config.RERUN_RATE,
+                        help="SA_RERUN_RATE for the app, 0 = no rerun throttling (default: %(default)s)")
+    parser.add_argument("--job-executor", choices=("process", "thread"), default=config.JOB_EXECUTOR,
+                        help="SA_JOB_EXECUTOR for background reports (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON result to this file")
+    parser.add_argument("--compare", help="baseline JSON result to compare p95 latencies against")
+    args = parser.parse_args(argv)
+
+    result = run_loadtest(
+        args.respondents, args.concurrency, mode=args.mode, per_widget=args.per_widget, seed=args.seed,
+        persist=not args.no_persist, max_sessions=args.max_sessions, rerun_rate=args.rerun_rate,
+        job_executor=args.job_executor,
+    )
+    print_report(result)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(f"Compared with {args.compare}:\n{compare(result, json.load(f))}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"-> {args.output}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
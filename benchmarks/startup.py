@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.loadtest import git_commit  # noqa: E402
+
+# =================================================================================================
+# 冷啟動測試：每次啟動一個全新的 Python process，量測到第一次完成 render_language_selection (step 0) 的時間
+# - first_render_s : process 內從第一行到 AppTest 第一次 run() 完成 (含 import streamlit、執行 app.py)
+# - process_s      : 由外部量測的 process 總時間 (含直譯器啟動與結束)
+# - heavy_modules  : 第一次畫面完成時已載入的重量級套件 (延遲載入時應為空)
+# --eager 會在啟動時先 import NumPy / pandas / Excel 套件，模擬延遲載入之前的行為作為對照
+# 用法：python benchmarks/startup.py [-n 10] [--eager] [-o result.json]
+# =================================================================================================
+
+APP_PATH = os.path.join(ROOT, "app.py")
+HEAVY_MODULES = ("numpy", "pandas", "openpyxl", "xlsxwriter", "altair", "pyarrow")
+
+# 子 process 執行的程式：argv[1] = app.py，其餘為預先 import 的模組 (--eager)
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+for name in sys.argv[2:]:
+    __import__(name)
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+rendered = time.perf_counter()
+print(json.dumps({
+    "ok": not at.exception and at.session_state.step == 0 and len(at.radio) > 0,
+    "import_s": imported - started,
+    "first_render_s": rendered - started,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once(eager=False):
+    env = dict(os.environ, SA_DB_PATH="", SA_METRICS="0")
+    args = [sys.executable, "-c", _CHILD, APP_PATH] + (list(HEAVY_MODULES[:4]) if eager else [])
+    started = time.perf_counter()
+    proc = subprocess.run(args, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_s"] = elapsed
+    return result
+
+
+def run_startup(n, eager=False):
+    # 第一次執行另外計算 (.pyc / 題庫編譯檔尚未建立時較慢)，不列入統計
+    warmup = measure_once(eager)
+    runs = [measure_once(eager) for _ in range(n)]
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "runs": n,
+            "eager": eager,
+        },
+        "warmup": warmup,
+        "errors": sum(not run["ok"] for run in runs),
+        "heavy_modules": sorted({name for run in runs for name in run["heavy_modules"]}),
+        **{
+            key: {
+                "median": statistics.median(run[key] for run in runs),
+                "min": min(run[key] for run in runs),
+                "max": max(run[key] for run in runs),
+            }
+            for key in ("import_s", "first_render_s", "process_s")
+        },
+    }
+
+
+def print_report(result):
+    meta = result["meta"]
+    print(f"{meta['runs']} cold starts{' (eager imports)' if meta['eager'] else ''}, {result['errors']} errors")
+    for key in ("import_s", "first_render_s", "process_s"):
+        stats = result[key]
+        print(f"  {key:<16} median {stats['median'] * 1000:7.0f} ms  (min {stats['min'] * 1000:.0f}, max {stats['max'] * 1000:.0f})")
+    print(f"  heavy modules loaded at first render: {', '.join(result['heavy_modules']) or 'none'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start time to the first render of the language step.")
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--eager", action="store_true", help="import NumPy / pandas / Excel writers up front (baseline)")
+    parser.add_argument("-o", "--output", help="write the JSON result to this file")
+    args = parser.parse_args(argv)
+
+    result = run_startup(args.runs, eager=args.eager)
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"-> {args.output}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
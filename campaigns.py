@@ -0,0 +1,153 @@
+import json
+import os
+
+import streamlit as st
+
+import config
+from catalog import CATALOG_PATH, LANGUAGES
+from results import STEP_NUMBERS, STEPS
+
+# =================================================================================================
+# 評估活動 (Campaign) 與租戶 (Tenant)
+# 來源為 data/campaigns.json (SA_CAMPAIGNS_PATH)：
+#   tenants   : 租戶代碼 -> company (題庫文字中的 {company}；字串或 {"zh": ..., "en": ...})、db (結果資料庫檔名，選填)
+#   campaigns : 活動代碼 -> tenant、catalog (題庫檔，相對於 data/，決定題庫版本)、steps (啟用的評估步驟)
+# 例如只做 TCFD 的活動：{"tenant": "acme", "catalog": "catalog.json", "steps": ["tcfd"]}
+# - 網址 ?campaign=<代碼> 選擇活動，未指定時使用 SA_CAMPAIGN
+# - 結果分區：每個租戶一個 SQLite 檔 (SA_TENANT_DB_DIR/<tenant>.db；預設租戶沿用 SA_DB_PATH)，
+#   查詢與彙總只開啟該租戶的檔案；檔案內以 campaign 為主鍵第一欄，單一活動的查詢是連續的範圍掃描，
+#   不隨其他子公司或歷年活動的資料量增加
+# =================================================================================================
+
+CAMPAIGNS_PATH = os.environ.get(
+    "SA_CAMPAIGNS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "campaigns.json")
+)
+DEFAULT_TENANT = "default"
+# 頁面編號：語言、基本資料在評估步驟之前，完成頁在最後
+INTRO_STEPS = (0, 1)
+FINISH_STEP = 6
+
+
+class CampaignError(ValueError):
+    pass
+
+
+class Tenant:
+    __slots__ = ("key", "company", "db_path")
+
+    def __init__(self, key, company, db_path):
+        self.key = key
+        self.company = company
+        self.db_path = db_path
+
+
+class Campaign:
+    __slots__ = ("key", "tenant", "catalog_path", "steps", "flow")
+
+    def __init__(self, key, tenant, catalog_path, steps):
+        self.key = key
+        self.tenant = tenant
+        self.catalog_path = catalog_path
+        # 依題庫順序排列 (與 results.STEPS 相同)
+        self.steps = tuple(step for step in STEPS if step in steps)
+        self.flow = INTRO_STEPS + tuple(STEP_NUMBERS[step] for step in self.steps) + (FINISH_STEP,)
+
+    def enabled(self, step):
+        return step in self.steps
+
+    def next_step(self, current):
+        return self.flow[min(self.flow.index(current) + 1, len(self.flow) - 1)]
+
+    def prev_step(self, current):
+        return self.flow[max(self.flow.index(current) - 1, 0)]
+
+
+def tenant_db_path(key, db=None):
+    # SA_DB_PATH 為空字串時停用持久化 (所有租戶)
+    if not config.DB_PATH:
+        return None
+    if db:
+        return os.path.join(config.TENANT_DB_DIR, db)
+    if key == DEFAULT_TENANT:
+        return config.DB_PATH
+    return os.path.join(config.TENANT_DB_DIR, f"{key}.db")
+
+
+def _require(cond, msg):
+    if not cond:
+        raise CampaignError(msg)
+
+
+def parse_campaigns(data, base_dir):
+    _require(isinstance(data, dict), "campaigns: top level must be an object")
+    tenants = {}
+    for key, info in data.get("tenants", {}).items():
+        company = info.get("company")
+        if isinstance(company, str):
+            company = dict.fromkeys(LANGUAGES, company)
+        _require(
+            isinstance(company, dict) and all(isinstance(company.get(lang), str) for lang in LANGUAGES),
+            f"tenants.{key}: 'company' must be a string or an object keyed by language",
+        )
+        tenants[key] = Tenant(key, company, tenant_db_path(key, info.get("db")))
+    campaigns = {}
+    for key, info in data.get("campaigns", {}).items():
+        tenant = info.get("tenant", DEFAULT_TENANT)
+        _require(tenant in tenants, f"campaigns.{key}: unknown tenant {tenant!r}")
+        steps = info.get("steps", STEPS)
+        _require(
+            steps and all(step in STEPS for step in steps),
+            f"campaigns.{key}: 'steps' must be a non-empty subset of {list(STEPS)}, got {steps!r}",
+        )
+        catalog_path = os.path.join(base_dir, info.get("catalog", os.path.basename(CATALOG_PATH)))
+        _require(os.path.exists(catalog_path), f"campaigns.{key}: catalog file not found: {catalog_path}")
+        campaigns[key] = Campaign(key, tenants[tenant], catalog_path, steps)
+    return tenants, campaigns
+
+
+class CampaignRegistry:
+    def __init__(self, tenants, campaigns):
+        self.tenants = tenants
+        self.campaigns = campaigns
+
+    def get(self, key):
+        campaign = self.campaigns.get(key)
+        if campaign is not None:
+            return campaign
+        # SA_CAMPAIGN 未列在設定檔中時 (單一公司部署)：預設租戶、預設題庫、全部步驟
+        if key == config.CAMPAIGN:
+            tenant = self.tenants.get(DEFAULT_TENANT) or Tenant(
+                DEFAULT_TENANT, config.DEFAULT_COMPANY, tenant_db_path(DEFAULT_TENANT)
+            )
+            return Campaign(key, tenant, CATALOG_PATH, STEPS)
+        raise CampaignError(f"Unknown campaign: {key!r}")
+
+
+def load_campaigns(path=CAMPAIGNS_PATH):
+    if not os.path.exists(path):
+        return CampaignRegistry({}, {})
+    with open(path, encoding="utf-8") as f:
+        return CampaignRegistry(*parse_campaigns(json.load(f), os.path.dirname(os.path.abspath(path))))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_registry(path, mtime_ns):
+    # mtime_ns 只作為快取鍵：設定檔更新後會以新的鍵重新載入
+    return load_campaigns(path)
+
+
+def get_campaign(key=None, path=CAMPAIGNS_PATH):
+    mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    return _load_registry(path, mtime_ns).get(key or config.CAMPAIGN)
+
+
+if __name__ == "__main__":
+    # 檢查設定檔並列出各活動的分區：python campaigns.py [path/to/campaigns.json]
+    import sys
+
+    registry = load_campaigns(sys.argv[1] if len(sys.argv) > 1 else CAMPAIGNS_PATH)
+    for campaign in registry.campaigns.values():
+        print(
+            f"{campaign.key}: tenant {campaign.tenant.key} ({campaign.tenant.company['en']}), "
+            f"steps {', '.join(campaign.steps)}, catalog {campaign.catalog_path}, db {campaign.tenant.db_path}"
+        )
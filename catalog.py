@@ -0,0 +1,238 @@
+import streamlit as st
+import json
+import os
+import pickle
+from collections import namedtuple
+from types import MappingProxyType
+
+# =================================================================================================
+# 題庫 (Catalog)：介面文字、利害關係人、重大性、TCFD、HRDD 議題
+# 來源為 data/catalog.json (含版本號)，第一次載入時驗證並編譯成 pickle，
+# 之後所有 session 透過 st.cache_resource 共用同一份唯讀資料；JSON 檔案更新 (mtime 改變) 時自動重新載入
+# =================================================================================================
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.json")
+
+# pickle 產物格式版本，改變 Catalog 內部結構時需遞增
+COMPILED_FORMAT = 2
+
+# 單一議題在特定語言下的顯示資料
+# key: 議題代碼, title: 顯示標題, definition: 議題定義, save_title: 存檔用英文標題
+Topic = namedtuple("Topic", ["key", "title", "definition", "save_title"])
+
+LANGUAGES = ("zh", "en")
+TOPIC_SECTIONS = ("materiality", "tcfd_risk", "tcfd_opp", "hrdd")
+TOPIC_FIELDS = ("zh", "en", "def_zh", "def_en")
+
+
+class CatalogError(ValueError):
+    pass
+
+
+# --- Schema 驗證 (只在載入新版本時執行一次) ---
+def _require(cond, msg):
+    if not cond:
+        raise CatalogError(msg)
+
+
+def _check_lang_map(value, where):
+    _require(isinstance(value, dict), f"{where}: expected an object keyed by language")
+    for lang in LANGUAGES:
+        _require(lang in value, f"{where}: missing language '{lang}'")
+
+
+def validate_catalog(data):
+    _require(isinstance(data, dict), "catalog: top level must be an object")
+    for field in ("version", "ui_texts", "stakeholder", "topics", "hrdd_sev_defs"):
+        _require(field in data, f"catalog: missing '{field}'")
+    _require(isinstance(data["version"], str) and data["version"], "catalog: 'version' must be a non-empty string")
+
+    ui_texts = data["ui_texts"]
+    _check_lang_map(ui_texts, "ui_texts")
+    ui_keys = set(ui_texts[LANGUAGES[0]])
+    for lang in LANGUAGES[1:]:
+        diff = ui_keys.symmetric_difference(ui_texts[lang])
+        _require(not diff, f"ui_texts: keys differ between languages: {sorted(diff)}")
+
+    sh = data["stakeholder"]
+    for field in ("rows", "col_keys", "cols", "col_defs"):
+        _require(field in sh, f"stakeholder: missing '{field}'")
+    _check_lang_map(sh["rows"], "stakeholder.rows")
+    _check_lang_map(sh["cols"], "stakeholder.cols")
+    n_rows = len(sh["rows"][LANGUAGES[0]])
+    for lang in LANGUAGES:
+        _require(len(sh["rows"][lang]) == n_rows, f"stakeholder.rows.{lang}: expected {n_rows} rows")
+        _require(len(sh["cols"][lang]) == len(sh["col_keys"]), f"stakeholder.cols.{lang}: length differs from col_keys")
+    for col_key in sh["col_keys"]:
+        _require(col_key in sh["col_defs"], f"stakeholder.col_defs: missing '{col_key}'")
+        _check_lang_map(sh["col_defs"][col_key], f"stakeholder.col_defs.{col_key}")
+
+    topics = data["topics"]
+    for section in TOPIC_SECTIONS:
+        _require(section in topics, f"topics: missing section '{section}'")
+        _require(topics[section], f"topics.{section}: section is empty")
+        for key, info in topics[section].items():
+            for field in TOPIC_FIELDS:
+                _require(isinstance(info.get(field), str), f"topics.{section}.{key}: missing text field '{field}'")
+
+    for scheme, texts in data["hrdd_sev_defs"].items():
+        _check_lang_map(texts, f"hrdd_sev_defs.{scheme}")
+    _require("general" in data["hrdd_sev_defs"], "hrdd_sev_defs: missing 'general'")
+    # 每個 HRDD 議題需明確指定嚴重度定義 (scale / scope / general)，不再從標題文字推測
+    for key, info in topics["hrdd"].items():
+        scheme = info.get("sev_scheme")
+        _require(
+            scheme in data["hrdd_sev_defs"],
+            f"topics.hrdd.{key}: 'sev_scheme' must be one of {sorted(data['hrdd_sev_defs'])}, got {scheme!r}",
+        )
+    return data
+
+
+# --- 編譯 / 載入 ---
+def compiled_path(path):
+    return os.path.splitext(path)[0] + ".pickle"
+
+
+def compile_catalog(path=CATALOG_PATH):
+    # JSON -> 驗證 -> pickle 產物；pickle 內記錄來源 mtime/size 以判斷是否過期
+    with open(path, encoding="utf-8") as f:
+        data = validate_catalog(json.load(f))
+    stat = os.stat(path)
+    artifact = {
+        "format": COMPILED_FORMAT,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "data": data,
+    }
+    # 先寫暫存檔再 rename，避免其他 worker 讀到寫一半的檔案
+    tmp_path = f"{compiled_path(path)}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, compiled_path(path))
+    except OSError:
+        # 唯讀部署環境無法寫入產物時，仍可直接使用 JSON 結果
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return data
+
+
+def _read_compiled(path, stat):
+    try:
+        with open(compiled_path(path), "rb") as f:
+            artifact = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if (
+        artifact.get("format") != COMPILED_FORMAT
+        or artifact.get("source_mtime_ns") != stat.st_mtime_ns
+        or artifact.get("source_size") != stat.st_size
+    ):
+        return None
+    return artifact["data"]
+
+
+def load_catalog_data(path=CATALOG_PATH):
+    stat = os.stat(path)
+    data = _read_compiled(path, stat)
+    if data is None:
+        data = compile_catalog(path)
+    return data
+
+
+def _freeze(obj):
+    # dict -> 唯讀 MappingProxyType, list -> tuple，避免任何 session 意外修改共用資料
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def _fill_company(obj, company, lang=LANGUAGES[-1]):
+    # 題庫文字中的 {company} 替換為租戶的公司名稱 (依語言)；語言由上層的 "zh" / "en" / "def_zh" 等鍵決定
+    if isinstance(obj, dict):
+        return {
+            k: _fill_company(v, company, next((l for l in LANGUAGES if k in (l, f"def_{l}")), lang))
+            for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [_fill_company(v, company, lang) for v in obj]
+    if isinstance(obj, str):
+        return obj.replace("{company}", company[lang])
+    return obj
+
+
+class Catalog:
+    def __init__(self, data, company=None):
+        if company is not None:
+            data = _fill_company(data, company)
+        data = _freeze(data)
+        self.version = data["version"]
+        self.ui_texts = data["ui_texts"]
+        self.sh_rows = data["stakeholder"]["rows"]
+        self.sh_cols_def = data["stakeholder"]["col_defs"]
+        self.sh_cols = data["stakeholder"]["cols"]
+        self.sh_col_keys = data["stakeholder"]["col_keys"]
+        self.mat_topic_data = data["topics"]["materiality"]
+        self.mat_topic_keys = tuple(self.mat_topic_data.keys())
+        self.tcfd_risk_data = data["topics"]["tcfd_risk"]
+        self.tcfd_opp_data = data["topics"]["tcfd_opp"]
+        self.hrdd_topic_data = data["topics"]["hrdd"]
+        self.hrdd_sev_defs = data["hrdd_sev_defs"]
+
+        # 預先依語言建立各議題的顯示資料，render 時只需查表
+        self._topics = {}
+        for section in TOPIC_SECTIONS:
+            for lang in LANGUAGES:
+                self._topics[(section, lang)] = tuple(
+                    Topic(key, info[lang], info[f"def_{lang}"], info["en"])
+                    for key, info in data["topics"][section].items()
+                )
+        self._topic_index = {
+            (section, lang): MappingProxyType({t.key: t for t in topics})
+            for (section, lang), topics in self._topics.items()
+        }
+
+        # HRDD 嚴重度定義：議題代碼 -> 該語言的定義文字
+        self._hrdd_sev_index = {
+            lang: MappingProxyType({
+                key: self.hrdd_sev_defs[info["sev_scheme"]][lang] for key, info in self.hrdd_topic_data.items()
+            })
+            for lang in LANGUAGES
+        }
+
+    # --- 唯讀查詢 (依語言) ---
+    def ui(self, lang):
+        return self.ui_texts[lang]
+
+    def topics(self, section, lang):
+        return self._topics[(section, lang)]
+
+    def topic(self, section, key, lang):
+        return self._topic_index[(section, lang)][key]
+
+    def hrdd_sev_def(self, key, lang):
+        return self._hrdd_sev_index[lang][key]
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _load_catalog(path, mtime_ns, company):
+    # mtime_ns 只作為快取鍵：檔案更新後會以新的鍵重新載入
+    return Catalog(load_catalog_data(path), dict(company) if company else None)
+
+
+def get_catalog(path=CATALOG_PATH, company=None):
+    # 每次 rerun 只做一次 os.stat，內容未變時直接取得共用的 Catalog (每個題庫檔 × 公司名稱一份)
+    # company: {語言: 公司名稱}
+    return _load_catalog(path, os.stat(path).st_mtime_ns, tuple(sorted(company.items())) if company else None)
+
+
+if __name__ == "__main__":
+    # 部署前預先編譯：python catalog.py [path/to/catalog.json]
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else CATALOG_PATH
+    compiled = compile_catalog(source)
+    n_topics = sum(len(compiled["topics"][s]) for s in TOPIC_SECTIONS)
+    print(f"Compiled catalog {compiled['version']} ({n_topics} topics) -> {compiled_path(source)}")
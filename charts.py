@@ -0,0 +1,272 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from lazy import lazy_import
+from results import STATUS_NAMES
+from scoring import FRAMEWORKS, LEVELS, PRODUCT_THRESHOLDS, SCALE, framework_axes, heatmap, product_score
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# =================================================================================================
+# 圖表：重大性矩陣、TCFD 風險 / 機會泡泡圖、HRDD 嚴重度 × 可能性熱度圖、利害關係人雷達圖
+# - 圖表資料：單一填答者 (record_chart_data) 與全組織彙總 (aggregate.chart_data) 產生相同欄位的小型 DataFrame
+# - Vega-Lite spec：以「圖表種類 + 資料內容雜湊」為鍵存放在 ChartCache (LRU)，
+#   重跑或多人檢視同一份彙總時直接取用，不重新建立 altair 物件
+# - Excel：以 xlsxwriter 原生圖表嵌入同一份資料，開啟檔案時由 Excel 繪製，不需產生圖片
+# =================================================================================================
+
+CHART_KINDS = ("materiality", "tcfd", "hrdd", "stakeholder")
+CHART_TITLES = {
+    "materiality": "Materiality Matrix",
+    "tcfd": "TCFD Risks & Opportunities",
+    "hrdd": "HRDD Severity × Probability",
+    "stakeholder": "Stakeholder Radar",
+}
+
+
+# --- 圖表資料 ---
+def record_chart_data(record):
+    layout = record.layout
+    arrays = {name: getattr(record, name)[np.newaxis] for name in ("materiality", "tcfd", "hrdd")}
+
+    mat = record.materiality
+    selected = mat[:, 0] != 0
+    opp_a, opp_b, _ = framework_axes(arrays, layout, "materiality_opp")
+    risk_a, risk_b, _ = framework_axes(arrays, layout, "materiality_risk")
+    materiality = pd.DataFrame({
+        "Topic": layout.mat_titles[selected],
+        "Opp Score": product_score(opp_a, opp_b)[0][selected],
+        "Risk Score": product_score(risk_a, risk_b)[0][selected],
+        "Status": [STATUS_NAMES[code] for code in mat[selected, 0]],
+    })
+
+    tcfd = pd.DataFrame({
+        "Type": layout.tcfd_types,
+        "Topic": layout.tcfd_titles,
+        "Severity/Value": record.tcfd[:, 0],
+        "Likelihood": record.tcfd[:, 1],
+    })
+    tcfd["Score"] = product_score(tcfd["Severity/Value"].to_numpy(), tcfd["Likelihood"].to_numpy())
+
+    hrdd_a, hrdd_b, _ = framework_axes(arrays, layout, "hrdd")
+    stakeholder = pd.DataFrame(record.stakeholder, index=list(layout.sh_rows), columns=list(layout.sh_cols))
+    return {
+        "materiality": materiality,
+        "tcfd": tcfd,
+        "hrdd": heat_cells(heatmap(hrdd_a, hrdd_b)),
+        "stakeholder": radar_frame(stakeholder),
+    }
+
+
+def heat_cells(counts):
+    # 5×5 次數 -> 長表格 (Severity, Probability, Count)
+    _, _, _, _, (row_axis, col_axis) = FRAMEWORKS["hrdd"]
+    rows, cols = np.indices(counts.shape) + 1
+    return pd.DataFrame({row_axis: rows.ravel(), col_axis: cols.ravel(), "Count": np.asarray(counts).ravel()})
+
+
+def radar_frame(frame):
+    # (利害關係人 × 構面) -> 長表格 (Stakeholder, Dimension, Score)
+    long = frame.rename_axis("Stakeholder").reset_index().melt(
+        id_vars="Stakeholder", var_name="Dimension", value_name="Score"
+    )
+    long["Score"] = long["Score"].astype(np.float64)
+    return long
+
+
+def data_key(kind, df):
+    h = hashlib.sha256(kind.encode("utf-8"))
+    h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# --- Vega-Lite spec (altair) ---
+def build_spec(kind, df):
+    import altair as alt
+
+    title = CHART_TITLES[kind]
+    if kind == "materiality":
+        limit = SCALE * SCALE
+        chart = alt.Chart(df, title=title).mark_circle(size=120, opacity=0.8).encode(
+            x=alt.X("Risk Score:Q", scale=alt.Scale(domain=[0, limit])),
+            y=alt.Y("Opp Score:Q", scale=alt.Scale(domain=[0, limit])),
+            color=alt.Color("Status:N"),
+            tooltip=["Topic", "Status", alt.Tooltip("Opp Score:Q", format=".1f"),
+                     alt.Tooltip("Risk Score:Q", format=".1f")],
+        )
+        rules = alt.Chart(pd.DataFrame({"mid": [limit / 2]})).mark_rule(strokeDash=[4, 4], color="gray")
+        chart = chart + rules.encode(x="mid:Q") + rules.encode(y="mid:Q")
+    elif kind == "tcfd":
+        chart = alt.Chart(df, title=title).mark_circle(opacity=0.6).encode(
+            x=alt.X("Likelihood:Q", scale=alt.Scale(domain=[0.5, SCALE + 0.5])),
+            y=alt.Y("Severity/Value:Q", scale=alt.Scale(domain=[0.5, SCALE + 0.5])),
+            size=alt.Size("Score:Q", scale=alt.Scale(domain=[1, SCALE * SCALE], range=[30, 900])),
+            color=alt.Color("Type:N", scale=alt.Scale(domain=["Opportunity", "Risk"], range=["#2E8B57", "#D62728"])),
+            tooltip=["Type", "Topic", alt.Tooltip("Score:Q", format=".1f")],
+        )
+    elif kind == "hrdd":
+        base = alt.Chart(df, title=title).encode(
+            x=alt.X("Probability:O", sort="ascending"),
+            y=alt.Y("Severity:O", sort="descending"),
+        )
+        chart = base.mark_rect().encode(
+            color=alt.Color("Count:Q", scale=alt.Scale(scheme="orangered")), tooltip=["Severity", "Probability", "Count"]
+        ) + base.mark_text().encode(text="Count:Q")
+    elif kind == "stakeholder":
+        chart = _radar_chart(alt, df, title)
+    else:
+        raise ValueError(f"Unknown chart kind: {kind!r}")
+    return chart.properties(width="container", height=360).to_dict()
+
+
+def _radar_chart(alt, df, title):
+    # Vega-Lite 沒有極座標折線，先把 (構面, 分數) 換算成 x / y 再以 line 連接 (首點重複一次以封閉多邊形)
+    dims = list(dict.fromkeys(df["Dimension"]))
+    angle = dict(zip(dims, np.linspace(0, 2 * np.pi, len(dims), endpoint=False)))
+    theta = df["Dimension"].map(angle).to_numpy(dtype=np.float64)
+    points = df.assign(x=df["Score"] * np.sin(theta), y=df["Score"] * np.cos(theta), order=df["Dimension"].map(dims.index))
+    closing = points[points["order"] == 0].assign(order=len(dims))
+    points = pd.concat([points, closing], ignore_index=True)
+
+    ring_theta = np.append(np.linspace(0, 2 * np.pi, len(dims), endpoint=False), 0.0)
+    rings = pd.DataFrame([
+        {"ring": r, "order": i, "x": r * np.sin(t), "y": r * np.cos(t)}
+        for r in range(1, SCALE + 1) for i, t in enumerate(ring_theta)
+    ])
+    labels = pd.DataFrame({
+        "Dimension": dims,
+        "x": [(SCALE + 0.7) * np.sin(angle[d]) for d in dims],
+        "y": [(SCALE + 0.7) * np.cos(angle[d]) for d in dims],
+    })
+    hidden = dict(axis=None, scale=alt.Scale(domain=[-SCALE - 1.5, SCALE + 1.5]))
+    grid = alt.Chart(rings).mark_line(color="lightgray", strokeWidth=1).encode(
+        x=alt.X("x:Q", **hidden), y=alt.Y("y:Q", **hidden), detail="ring:N", order="order:Q"
+    )
+    text = alt.Chart(labels).mark_text(fontSize=11).encode(x=alt.X("x:Q", **hidden), y=alt.Y("y:Q", **hidden), text="Dimension")
+    lines = alt.Chart(points, title=title).mark_line(point=True, strokeWidth=2).encode(
+        x=alt.X("x:Q", **hidden), y=alt.Y("y:Q", **hidden), color="Stakeholder:N", order="order:Q",
+        tooltip=["Stakeholder", "Dimension", alt.Tooltip("Score:Q", format=".1f")],
+    )
+    return alt.layer(grid, text, lines)
+
+
+class ChartCache:
+    # spec 以資料雜湊為鍵，LRU 淘汰 (spec 為不可變的 dict，可跨 session 共用)
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, kind, df):
+        key = data_key(kind, df)
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is not None:
+                self._entries.move_to_end(key)
+                return spec
+        spec = build_spec(kind, df)
+        with self._lock:
+            self._entries[key] = spec
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return spec
+
+
+# --- Excel 原生圖表 ---
+def add_workbook_charts(workbook, data, sheet_name="Charts"):
+    # data 為 record_chart_data / aggregate.chart_data 的結果；資料寫在工作表左側，圖表放在右側
+    ws = workbook.add_worksheet(sheet_name)
+    bold = workbook.add_format({"bold": True})
+    row = 0
+
+    def write_table(df):
+        nonlocal row
+        start = row
+        ws.write_row(row, 0, list(df.columns), bold)
+        for values in df.itertuples(index=False):
+            row += 1
+            ws.write_row(row, 0, [v.item() if isinstance(v, np.generic) else v for v in values])
+        row += 3
+        return start, start + len(df)
+
+    def ref(first, last, col):
+        return [sheet_name, first, col, last, col]
+
+    if "materiality" in data and len(data["materiality"]):
+        first, last = write_table(data["materiality"])
+        chart = workbook.add_chart({"type": "scatter"})
+        chart.add_series({
+            "name": "Topics", "categories": ref(first + 1, last, 2), "values": ref(first + 1, last, 1),
+            "marker": {"type": "circle", "size": 8},
+            "data_labels": {"custom": [{"value": f"='{sheet_name}'!$A${r + 1}"} for r in range(first + 1, last + 1)]},
+        })
+        _style_axes(chart, CHART_TITLES["materiality"], "Risk Score", "Opp Score", SCALE * SCALE)
+        ws.insert_chart(first, 7, chart)
+        row = max(row, first + 22)
+
+    if "tcfd" in data and len(data["tcfd"]):
+        # xlsxwriter 沒有泡泡圖：依 Type × 分數等級排序後，每組一個 scatter series，以標記大小代表等級
+        tcfd = data["tcfd"].assign(Level=np.digitize(data["tcfd"]["Score"], PRODUCT_THRESHOLDS))
+        tcfd = tcfd.sort_values(["Type", "Level"], kind="stable")
+        first, last = write_table(tcfd)
+        chart = workbook.add_chart({"type": "scatter"})
+        positions = np.arange(first + 1, last + 1)
+        for name, color in (("Opportunity", "#2E8B57"), ("Risk", "#D62728")):
+            for level, label in enumerate(LEVELS):
+                rows = positions[((tcfd["Type"] == name) & (tcfd["Level"] == level)).to_numpy()]
+                if len(rows) == 0:
+                    continue
+                chart.add_series({
+                    "name": f"{name} ({label})", "categories": ref(rows[0], rows[-1], 3),
+                    "values": ref(rows[0], rows[-1], 2),
+                    "marker": {"type": "circle", "size": 6 + 5 * level,
+                               "fill": {"color": color, "transparency": 40}, "border": {"none": True}},
+                })
+        _style_axes(chart, CHART_TITLES["tcfd"], "Likelihood", "Severity/Value", SCALE)
+        ws.insert_chart(first, 7, chart)
+        row = max(row, first + 22)
+
+    if "hrdd" in data:
+        # Excel 沒有熱度圖類型：以 5×5 表格 + 色階條件格式呈現
+        counts = data["hrdd"]["Count"].to_numpy().reshape(SCALE, SCALE)
+        ws.write(row, 0, CHART_TITLES["hrdd"], bold)
+        ws.write(row + 1, 0, "Severity \\ Probability", bold)
+        ws.write_row(row + 1, 1, list(range(1, SCALE + 1)), bold)
+        for i in range(SCALE, 0, -1):
+            r = row + 2 + SCALE - i
+            ws.write(r, 0, i, bold)
+            ws.write_row(r, 1, counts[i - 1].tolist())
+        ws.conditional_format(row + 2, 1, row + 1 + SCALE, SCALE, {
+            "type": "2_color_scale", "min_color": "#FFF5EB", "max_color": "#D94801",
+        })
+        row += SCALE + 5
+
+    if "stakeholder" in data and len(data["stakeholder"]):
+        wide = data["stakeholder"].pivot(index="Dimension", columns="Stakeholder", values="Score")
+        wide = wide.reindex(list(dict.fromkeys(data["stakeholder"]["Dimension"])))
+        first, last = write_table(wide.reset_index())
+        chart = workbook.add_chart({"type": "radar"})
+        for col in range(1, wide.shape[1] + 1):
+            chart.add_series({
+                "name": [sheet_name, first, col], "categories": ref(first + 1, last, 0), "values": ref(first + 1, last, col),
+            })
+        chart.set_title({"name": CHART_TITLES["stakeholder"]})
+        chart.set_y_axis({"min": 0, "max": SCALE, "major_unit": 1})
+        chart.set_size({"width": 620, "height": 420})
+        ws.insert_chart(first, 9, chart)
+    return ws
+
+
+def _style_axes(chart, title, x_name, y_name, limit):
+    chart.set_title({"name": title})
+    chart.set_x_axis({"name": x_name, "min": 0, "max": limit, "major_gridlines": {"visible": True}})
+    chart.set_y_axis({"name": y_name, "min": 0, "max": limit})
+    chart.set_legend({"position": "bottom"})
+    chart.set_size({"width": 620, "height": 420})
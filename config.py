@@ -0,0 +1,94 @@
+import os
+
+# =================================================================================================
+# 部署設定 (由環境變數提供，未設定時使用預設值)
+# =================================================================================================
+
+# 輸入模式
+# live    : (預設) 每個 widget 即時更新，議題區塊以 fragment 局部重跑
+# batched : 每個評估步驟包成一個 st.form，整頁填完後一次送出 (一個步驟只有一次 round trip)
+INPUT_MODES = ("live", "batched")
+INPUT_MODE = os.environ.get("SA_INPUT_MODE", "live").strip().lower()
+if INPUT_MODE not in INPUT_MODES:
+    raise ValueError(f"SA_INPUT_MODE must be one of {INPUT_MODES}, got {INPUT_MODE!r}")
+BATCHED_INPUT = INPUT_MODE == "batched"
+
+# 作答結果資料庫 (SQLite)；SA_DB_PATH 設為空字串可停用持久化
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.environ.get("SA_DATA_DIR", os.path.join(BASE_DIR, "var"))
+DB_PATH = os.environ.get("SA_DB_PATH", os.path.join(DATA_DIR, "responses.db"))
+DB_POOL_SIZE = int(os.environ.get("SA_DB_POOL_SIZE", "4"))
+
+# 目前進行中的評估活動代碼，與填答者 ID 一起作為結果的鍵
+# 多個活動 / 租戶定義在 data/campaigns.json (見 campaigns.py)，網址 ?campaign=<代碼> 選擇，未指定時使用此值
+CAMPAIGN = os.environ.get("SA_CAMPAIGN", "default")
+# 預設租戶的公司名稱 (依語言；campaigns.json 未定義預設租戶時使用)；其他租戶的結果資料庫放在 SA_TENANT_DB_DIR
+DEFAULT_COMPANY = {"zh": os.environ.get("SA_COMPANY_ZH", "伊雲谷"), "en": os.environ.get("SA_COMPANY", "eCloudvalley")}
+TENANT_DB_DIR = os.environ.get("SA_TENANT_DB_DIR", os.path.join(DATA_DIR, "tenants"))
+
+# 作答草稿 (中途重新整理可續填)；SA_DRAFTS=0 可停用
+DRAFTS_ENABLED = os.environ.get("SA_DRAFTS", "1") != "0"
+DRAFT_TTL_SECONDS = int(os.environ.get("SA_DRAFT_TTL", str(3 * 24 * 3600)))
+DRAFT_MAX_ENTRIES = int(os.environ.get("SA_DRAFT_MAX_ENTRIES", "5000"))
+# 連續調整 widget 時，最多每隔幾秒保存一次 (步驟切換會立即保存)
+DRAFT_DEBOUNCE_SECONDS = float(os.environ.get("SA_DRAFT_DEBOUNCE", "2"))
+# 草稿儲存位置 (見 drafts.py)：memory (單一 process)、sqlite (SA_DRAFT_DB，同機多 process 共用)、
+# redis (SA_REDIS_URL，跨節點共用；可用 python resp.py 啟動本機替代伺服器)
+# 多個 app process 放在負載平衡之後時請使用 sqlite / redis
+DRAFT_STORE = os.environ.get("SA_DRAFT_STORE", "memory").strip().lower()
+DRAFT_DB_PATH = os.environ.get("SA_DRAFT_DB", os.path.join(DATA_DIR, "drafts.db"))
+REDIS_URL = os.environ.get("SA_REDIS_URL", "redis://127.0.0.1:6379/0")
+
+# 提交去重：每個 process 記住多少個 (填答者, 步驟) 的上一次作答雜湊 (見 idempotency.py)
+DEDUPE_ENTRIES = int(os.environ.get("SA_DEDUPE_ENTRIES", "50000"))
+
+# Excel 報告快取總大小上限 (MB)
+REPORT_CACHE_MB = int(os.environ.get("SA_REPORT_CACHE_MB", "64"))
+
+# 背景工作 (Excel 報告產生)：worker 數、排隊上限、執行方式 (process / thread)，完成頁查詢狀態的間隔 (秒)
+JOB_WORKERS = int(os.environ.get("SA_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.environ.get("SA_JOB_QUEUE", "64"))
+JOB_EXECUTOR = os.environ.get("SA_JOB_EXECUTOR", "process").strip().lower()
+JOB_POLL_SECONDS = float(os.environ.get("SA_JOB_POLL", "1"))
+# 等待背景報告的上限 (秒)；worker 卡住超過此時間即改為按下下載時才產生
+JOB_WAIT_SECONDS = float(os.environ.get("SA_JOB_WAIT", "30"))
+
+# 圖表 spec 快取的項目數上限 (以資料內容雜湊為鍵)
+CHART_CACHE_ENTRIES = int(os.environ.get("SA_CHART_CACHE_ENTRIES", "256"))
+
+# 每個 session 的 st.session_state 大小上限 (KB，以 pickle 後大小計算)；超過時釋放可重建的狀態，0 = 不檢查
+SESSION_BUDGET_KB = int(os.environ.get("SA_SESSION_BUDGET_KB", "256"))
+# 檢查需要 pickle 整個 session_state：只在步驟切換後，以及同一步驟每隔幾次 rerun 檢查一次
+SESSION_BUDGET_EVERY = int(os.environ.get("SA_SESSION_BUDGET_EVERY", "20"))
+
+# 入場控制 (見 admission.py)：每個 process 同時作答的 session 上限 (0 = 不限制)，超過時進入等候室
+# SA_SESSION_IDLE 秒沒有動作的 session 釋放名額；等候室每隔 SA_WAITING_ROOM_POLL 秒查詢一次是否輪到
+MAX_SESSIONS = int(os.environ.get("SA_MAX_SESSIONS", "200"))
+SESSION_IDLE_SECONDS = float(os.environ.get("SA_SESSION_IDLE", "900"))
+WAITING_ROOM_POLL_SECONDS = float(os.environ.get("SA_WAITING_ROOM_POLL", "5"))
+# 每個 session 的 rerun 速率 (次 / 秒，0 = 不限制) 與可累積次數；超過時該次 rerun 只顯示提示，數秒後自動恢復
+RERUN_RATE = float(os.environ.get("SA_RERUN_RATE", "5"))
+RERUN_BURST = int(os.environ.get("SA_RERUN_BURST", "10"))
+
+# 批次提交 API (api.py，與 Streamlit app 分開啟動)：預設只綁定 127.0.0.1
+# SA_API_TOKEN 設定時需附上 Authorization: Bearer <token>；SA_API_MAX_BATCH 為單一請求的提交數上限
+API_HOST = os.environ.get("SA_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("SA_API_PORT", "8601"))
+API_TOKEN = os.environ.get("SA_API_TOKEN", "")
+API_MAX_BATCH = int(os.environ.get("SA_API_MAX_BATCH", "5000"))
+
+# 管理頁 (?admin=<token>)：未設定 SA_ADMIN_TOKEN 時停用
+ADMIN_TOKEN = os.environ.get("SA_ADMIN_TOKEN", "")
+ADMIN_REFRESH_SECONDS = float(os.environ.get("SA_ADMIN_REFRESH", "10"))
+
+# 效能量測 (預設停用，見 instrumentation.py)
+# SA_METRICS=1 啟用；SA_METRICS_PORT > 0 時於 127.0.0.1:<port>/metrics 提供 Prometheus 文字格式，
+# SA_METRICS_FILE 設定時每隔 SA_METRICS_FILE_INTERVAL 秒寫入該檔案
+METRICS_ENABLED = os.environ.get("SA_METRICS", "0") == "1"
+METRICS_PORT = int(os.environ.get("SA_METRICS_PORT", "0"))
+METRICS_FILE = os.environ.get("SA_METRICS_FILE", "")
+METRICS_FILE_INTERVAL = float(os.environ.get("SA_METRICS_FILE_INTERVAL", "15"))
+# 取樣 profiler：rerun 超過 SA_PROFILE_SLOW_MS 毫秒時輸出 folded stacks (0 = 停用)
+PROFILE_SLOW_MS = float(os.environ.get("SA_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("SA_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.environ.get("SA_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
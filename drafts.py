@@ -0,0 +1,271 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from resp import RespClient
+from storage import ConnectionPool
+
+# =================================================================================================
+# 作答草稿快取 (Draft Cache)
+# 以可續填的 token 為鍵，保存填答者目前的步驟資訊 (meta) 與 widget 作答值 (values)
+# - 只合併有變動的 widget 值，不保存整個 DataFrame
+# - TTL + LRU 淘汰：過期或超過上限的草稿會被移除，記憶體用量有上限
+# 整個 process 共用一個實例 (由 app.py 以 st.cache_resource 建立)
+# 儲存位置 (SA_DRAFT_STORE)：
+#   memory : (預設) DraftCache，只在目前的 process 中
+#   sqlite : SqliteDraftStore，同一台機器 / 共用磁碟上的多個 app process 共用
+#   redis  : RedisDraftStore，任何 Redis 相容伺服器 (或 resp.py 的本機替代伺服器)，可跨節點共用
+# 使用共用的儲存時，多個 app process 可放在不需 sticky session 的負載平衡之後：瀏覽器重新連線到其他
+# process (或 pod 重新啟動) 時，網址中的 ?resume=<token> 會從共用儲存還原步驟、基本資料、已選議題與各步驟結果
+# 共用儲存中的內容以 JSON 保存 (不使用 pickle，儲存被竄改時也不會執行任意程式碼)
+# =================================================================================================
+
+# 需要保存到草稿的 widget key 前綴
+DRAFT_KEY_PREFIXES = (
+    "sh_", "mat_sel_", "mat_stat_", "mat_oval_", "mat_oprob_", "mat_rimp_", "mat_rprob_", "tcfd_", "hr_",
+)
+
+# 需要保存到草稿的 session 狀態
+DRAFT_META_KEYS = ("step", "language", "user_info", "selected_materiality_keys", "respondent_id", "campaign")
+
+
+def new_token():
+    return secrets.token_urlsafe(16)
+
+
+def is_draft_key(key):
+    return isinstance(key, str) and key.startswith(DRAFT_KEY_PREFIXES)
+
+
+class _Draft:
+    __slots__ = ("meta", "values", "updated_at")
+
+    def __init__(self):
+        self.meta = {}
+        self.values = {}
+        self.updated_at = 0.0
+
+
+class DraftCache:
+    def __init__(self, max_entries=5000, ttl=3 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        # 回傳 (meta, values) 的複本；不存在或已過期時回傳 None
+        now = time.time()
+        with self._lock:
+            draft = self._entries.get(token)
+            if draft is None:
+                return None
+            if now - draft.updated_at > self.ttl:
+                del self._entries[token]
+                return None
+            # 讀取也延長期限 (與 RedisDraftStore 的 EXPIRE 相同)；移到尾端時一併更新 updated_at，
+            # OrderedDict 才會維持依 updated_at 排序，_evict 只檢查開頭不會漏掉過期的草稿
+            draft.updated_at = now
+            self._entries.move_to_end(token)
+            return dict(draft.meta), dict(draft.values)
+
+    def save(self, token, changes, meta=None):
+        # 增量保存：只合併有變動的 widget 值
+        now = time.time()
+        with self._lock:
+            draft = self._entries.get(token)
+            if draft is None:
+                draft = self._entries[token] = _Draft()
+            else:
+                self._entries.move_to_end(token)
+            draft.values.update(changes)
+            if meta is not None:
+                draft.meta = dict(meta)
+            draft.updated_at = now
+            self._evict(now)
+
+    def discard(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def _evict(self, now):
+        # 最舊的項目在 OrderedDict 前端：先移除過期草稿，再依 LRU 控制數量
+        while self._entries:
+            token, draft = next(iter(self._entries.items()))
+            if now - draft.updated_at > self.ttl or len(self._entries) > self.max_entries:
+                del self._entries[token]
+            else:
+                break
+
+
+# --- 共用儲存 ---
+DRAFT_STORES = ("memory", "sqlite", "redis")
+
+DRAFT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    token       TEXT PRIMARY KEY,
+    meta        TEXT NOT NULL,
+    updated_at  REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_drafts_updated ON drafts (updated_at);
+CREATE TABLE IF NOT EXISTS draft_values (
+    token  TEXT NOT NULL,
+    key    TEXT NOT NULL,
+    value  TEXT NOT NULL,
+    PRIMARY KEY (token, key)
+) WITHOUT ROWID;
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class SqliteDraftStore:
+    # 與 DraftCache 相同的介面；widget 值每個 key 一列，保存時只 UPSERT 有變動的 key
+    # 淘汰 (TTL + 數量上限) 每 evict_every 次保存執行一次
+    def __init__(self, path, max_entries=5000, ttl=3 * 24 * 3600, pool_size=4, evict_every=200):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self.pool = ConnectionPool(path, size=pool_size)
+        self._saves = 0
+        with self.pool.connection() as conn:
+            conn.executescript(DRAFT_SCHEMA)
+
+    def __len__(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM drafts").fetchone()[0]
+
+    def get(self, token):
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT meta, updated_at FROM drafts WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl:
+                # 在已取得的連線上刪除 (連線池用盡時另取一條連線會卡住)
+                self._delete(conn, token)
+                return None
+            values = conn.execute("SELECT key, value FROM draft_values WHERE token = ?", (token,)).fetchall()
+        return json.loads(row[0]), {key: json.loads(value) for key, value in values}
+
+    def save(self, token, changes, meta=None):
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if meta is not None:
+                    conn.execute(
+                        "INSERT INTO drafts (token, meta, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT DO UPDATE SET meta = excluded.meta, updated_at = excluded.updated_at",
+                        (token, _dumps(meta), now),
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO drafts (token, meta, updated_at) VALUES (?, '{}', ?) "
+                        "ON CONFLICT DO UPDATE SET updated_at = excluded.updated_at",
+                        (token, now),
+                    )
+                conn.executemany(
+                    "INSERT INTO draft_values (token, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT DO UPDATE SET value = excluded.value",
+                    [(token, key, _dumps(value)) for key, value in changes.items()],
+                )
+                self._saves += 1
+                if self._saves % self.evict_every == 0:
+                    self._evict(conn, now)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def discard(self, token):
+        with self.pool.connection() as conn:
+            self._delete(conn, token)
+
+    @staticmethod
+    def _delete(conn, token):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM draft_values WHERE token = ?", (token,))
+            conn.execute("DELETE FROM drafts WHERE token = ?", (token,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn, now):
+        # 過期的草稿，以及依最後保存時間排序超過 max_entries 的草稿
+        tokens = conn.execute(
+            "SELECT token FROM drafts WHERE updated_at < ? UNION "
+            "SELECT token FROM (SELECT token FROM drafts ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (now - self.ttl, self.max_entries),
+        ).fetchall()
+        conn.executemany("DELETE FROM draft_values WHERE token = ?", tokens)
+        conn.executemany("DELETE FROM drafts WHERE token = ?", tokens)
+
+    def close(self):
+        self.pool.close()
+
+
+class RedisDraftStore:
+    # <prefix><token>:meta 為 JSON 字串，<prefix><token>:values 為 hash (widget key -> JSON)
+    # 每次保存 / 讀取都以 EXPIRE 延長 TTL (與 DraftCache 相同，以最後使用時間計算)；數量上限交給伺服器的 maxmemory
+    def __init__(self, client, ttl=3 * 24 * 3600, prefix="sa:draft:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _keys(self, token):
+        return f"{self.prefix}{token}:meta", f"{self.prefix}{token}:values"
+
+    def get(self, token):
+        meta_key, values_key = self._keys(token)
+        meta, values, _, _ = self.client.pipeline([
+            ("GET", meta_key), ("HGETALL", values_key), ("EXPIRE", meta_key, self.ttl), ("EXPIRE", values_key, self.ttl),
+        ])
+        if meta is None or isinstance(meta, Exception):
+            return None
+        if isinstance(values, Exception):
+            raise values
+        return json.loads(meta), {
+            key.decode("utf-8"): json.loads(value) for key, value in zip(values[::2], values[1::2])
+        }
+
+    def save(self, token, changes, meta=None):
+        meta_key, values_key = self._keys(token)
+        commands = []
+        if meta is not None:
+            commands.append(("SET", meta_key, _dumps(meta), "EX", self.ttl))
+        else:
+            commands.append(("EXPIRE", meta_key, self.ttl))
+        if changes:
+            commands.append(("HSET", values_key, *[x for key, value in changes.items() for x in (key, _dumps(value))]))
+        commands.append(("EXPIRE", values_key, self.ttl))
+        for reply in self.client.pipeline(commands):
+            if isinstance(reply, Exception):
+                raise reply
+
+    def discard(self, token):
+        self.client.execute("DEL", *self._keys(token))
+
+    def close(self):
+        self.client.close()
+
+
+def open_draft_store(kind="memory", max_entries=5000, ttl=3 * 24 * 3600, path=None, url=None):
+    if kind == "memory":
+        return DraftCache(max_entries=max_entries, ttl=ttl)
+    if kind == "sqlite":
+        return SqliteDraftStore(path, max_entries=max_entries, ttl=ttl)
+    if kind == "redis":
+        return RedisDraftStore(RespClient(url), ttl=ttl)
+    raise ValueError(f"draft store must be one of {DRAFT_STORES}, got {kind!r}")
@@ -0,0 +1,142 @@
+import argparse
+import csv
+import io
+import json
+import time
+
+import xlsxwriter
+
+import config
+from reports import XLSX_MIME
+from storage import SCORE_COLUMNS, ResponseStore
+
+# =================================================================================================
+# 多格式匯出 (CSV / Parquet / JSON Lines / XLSX)
+# 所有格式共用同一個正規化資料模型：SCORE_COLUMNS 長表格
+#   (campaign, respondent, name, department, section, topic, metric, value)
+# 輸入為「分批 (chunk) 的列」的 iterable (ResponseStore.iter_scores，fetchmany 分批)，逐批寫出，
+# 不需要一次載入全部資料；目前只由命令列使用 (python exporters.py)
+# XLSX 使用 xlsxwriter 的 constant_memory 模式，超過工作表列數上限時自動換頁
+# =================================================================================================
+
+EXPORTERS = {}
+
+XLSX_MAX_ROWS = 1048576
+
+
+def exporter(name, extension, mime):
+    def register(cls):
+        cls.name, cls.extension, cls.mime = name, extension, mime
+        EXPORTERS[name] = cls
+        return cls
+
+    return register
+
+
+def get_exporter(name):
+    try:
+        return EXPORTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown export format {name!r}; choose from {sorted(EXPORTERS)}") from None
+
+
+@exporter("csv", ".csv", "text/csv")
+class CsvExporter:
+    def write(self, chunks, fileobj):
+        text = io.TextIOWrapper(fileobj, encoding="utf-8", newline="", write_through=True)
+        writer = csv.writer(text)
+        writer.writerow(SCORE_COLUMNS)
+        for chunk in chunks:
+            writer.writerows(chunk)
+            yield
+        text.detach()
+
+
+@exporter("jsonl", ".jsonl", "application/x-ndjson")
+class JsonLinesExporter:
+    def write(self, chunks, fileobj):
+        for chunk in chunks:
+            fileobj.write("".join(
+                json.dumps(dict(zip(SCORE_COLUMNS, row)), ensure_ascii=False) + "\n" for row in chunk
+            ).encode("utf-8"))
+            yield
+
+
+@exporter("parquet", ".parquet", "application/vnd.apache.parquet")
+class ParquetExporter:
+    def write(self, chunks, fileobj):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the 'pyarrow' package") from None
+
+        schema = pa.schema(
+            [(col, pa.dictionary(pa.int32(), pa.string())) for col in SCORE_COLUMNS[:-1]] + [("value", pa.uint8())]
+        )
+        with pq.ParquetWriter(fileobj, schema, compression="zstd") as writer:
+            for chunk in chunks:
+                columns = list(zip(*chunk))
+                arrays = [pa.array(col, pa.string()).dictionary_encode() for col in columns[:-1]]
+                arrays.append(pa.array(columns[-1], pa.uint8()))
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                yield
+
+
+@exporter("xlsx", ".xlsx", XLSX_MIME)
+class XlsxExporter:
+    def write(self, chunks, fileobj):
+        # constant_memory：每列寫出後即釋放，記憶體用量與總列數無關
+        workbook = xlsxwriter.Workbook(fileobj, {"constant_memory": True, "in_memory": False})
+        bold = workbook.add_format({"bold": True})
+        sheet, row_idx, n_sheets = None, XLSX_MAX_ROWS, 0
+        for chunk in chunks:
+            for row in chunk:
+                if row_idx >= XLSX_MAX_ROWS:
+                    n_sheets += 1
+                    sheet = workbook.add_worksheet("Scores" if n_sheets == 1 else f"Scores {n_sheets}")
+                    sheet.write_row(0, 0, SCORE_COLUMNS, bold)
+                    row_idx = 1
+                sheet.write_row(row_idx, 0, row)
+                row_idx += 1
+            yield
+        if sheet is None:
+            workbook.add_worksheet("Scores").write_row(0, 0, SCORE_COLUMNS, bold)
+        workbook.close()
+
+
+def export(fmt, chunks, fileobj):
+    for _ in get_exporter(fmt).write(chunks, fileobj):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored assessment scores.")
+    parser.add_argument("--db", default=config.DB_PATH, help="SQLite response store (default: %(default)s)")
+    parser.add_argument("--campaign", help="only export this campaign")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default="csv")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("-o", "--output", help="output file (default: scores<ext>)")
+    args = parser.parse_args(argv)
+
+    output = args.output or "scores" + EXPORTERS[args.format].extension
+    store = ResponseStore(args.db)
+    started = time.perf_counter()
+    n_rows = 0
+
+    def counted(chunks):
+        nonlocal n_rows
+        for chunk in chunks:
+            n_rows += len(chunk)
+            yield chunk
+
+    try:
+        with open(output, "wb") as f:
+            export(args.format, counted(store.iter_scores(args.campaign, chunk_size=args.chunk_size)), f)
+    finally:
+        store.close()
+    print(f"Exported {n_rows} rows as {args.format} in {time.perf_counter() - started:.2f}s -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from instrumentation import metrics
+
+# =================================================================================================
+# 提交去重 (idempotency)
+# SubmissionFilter 以 scope = (campaign, respondent, step) 為鍵，記住該 scope 上一次提交的 digest (作答內容的雜湊)
+# - 按兩下「下一步」、網路重送或 API 重送同一批資料時，同一 scope 的 digest 與上次相同 -> 直接丟棄，
+#   不進入寫入佇列、不碰資料庫 (O(1) 查表)
+# - 只和「同一 scope 的上一次提交」比較：返回上一步修改 (A -> B) 再改回 A 時仍會寫入
+# - 以 LRU 控制項目數；被淘汰或其他 process 收到的重送仍會寫入，資料庫的 UPSERT 本身是冪等的，
+#   去重只是省下重複的寫入與 trigger，不影響正確性
+# =================================================================================================
+
+DIGEST_SIZE = 16
+
+
+def content_digest(*parts):
+    # parts 為 bytes / str；以長度前綴分隔，避免不同切分得到相同的雜湊
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.digest()
+
+
+class SubmissionFilter:
+    # scope -> 上一次提交的 digest；整個 ResponseStore 共用
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._last = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._last)
+
+    def admit(self, scope, digest):
+        # True = 新的提交 (應寫入)；False = 與上一次相同的重送 (丟棄)
+        with self._lock:
+            if self._last.get(scope) == digest:
+                self._last.move_to_end(scope)
+                duplicate = True
+            else:
+                self._last[scope] = digest
+                self._last.move_to_end(scope)
+                while len(self._last) > self.max_entries:
+                    self._last.popitem(last=False)
+                duplicate = False
+        if duplicate:
+            metrics.count("sa_submissions_deduplicated_total")
+        return not duplicate
+
+    def forget(self, keys):
+        # keys: {(campaign, respondent)}；寫入失敗時移除這些填答者所有步驟的紀錄，讓之後的重送可以再寫入一次
+        # 只在寫入失敗時呼叫，逐一掃描即可
+        with self._lock:
+            for scope in [scope for scope in self._last if scope[:2] in keys]:
+                del self._last[scope]
+
+    def clear(self):
+        with self._lock:
+            self._last.clear()
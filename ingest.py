@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import config
+from catalog import CATALOG_PATH, load_catalog_data
+from reports import iter_workbook_rows
+from results import STATUS_CODES
+from storage import ResponseStore, StoreQueueFull
+
+# =================================================================================================
+# 匯入歷史結果報告 (generate_excel 產生的 Stakeholder / Materiality / TCFD / HRDD 工作表)
+# - 逐一掃描資料夾 (不先建立完整檔案清單)，以 process pool 平行解析 (parse_files，aggregate.py 也共用)
+# - 同時處理中的檔案數有上限，記憶體用量不隨檔案數增加
+# - 每個檔案依目前題庫驗證後寫入 ResponseStore (SQLite)；respondent 由檔案路徑決定，重複匯入會覆蓋而非重複
+#   (報告是該填答者的完整結果：先清除所有 section 的舊資料，例如重新選擇後已不在前 10 名的重大性議題)
+# =================================================================================================
+
+# 各 section 的指標與允許值
+SECTION_METRICS = {
+    "stakeholder": None,  # 由題庫的 col_keys 決定，值 1-5
+    "materiality": {
+        "Status": set(STATUS_CODES.values()),
+        "Opp Value Creation": range(1, 6),
+        "Opp Probability": range(1, 6),
+        "Risk Impact": range(1, 6),
+        "Risk Probability": range(1, 6),
+    },
+    "tcfd_opp": {"Severity/Value": range(1, 6), "Likelihood": range(1, 6)},
+    "tcfd_risk": {"Severity/Value": range(1, 6), "Likelihood": range(1, 6)},
+    "hrdd": {
+        "Severity": range(1, 6),
+        "Probability": range(1, 6),
+        "Supplier (Value Chain)": (0, 1),
+        "Customer (Value Chain)": (0, 1),
+    },
+}
+
+_schema = None
+
+
+def build_schema(catalog_data):
+    # section -> (允許的議題 (英文標題), 指標 -> 允許值)
+    topics = catalog_data["topics"]
+    stakeholder = catalog_data["stakeholder"]
+    schema = {
+        "stakeholder": (
+            set(stakeholder["rows"]["en"]),
+            {metric: range(1, 6) for metric in stakeholder["col_keys"]},
+        ),
+    }
+    for section in ("materiality", "tcfd_opp", "tcfd_risk", "hrdd"):
+        schema[section] = ({info["en"] for info in topics[section].values()}, SECTION_METRICS[section])
+    return schema
+
+
+def validate_rows(schema, rows):
+    for section, topic, metric, value in rows:
+        if section not in schema:
+            return f"unknown section {section!r}"
+        topics, metrics = schema[section]
+        if topic not in topics:
+            return f"{section}: topic {topic!r} is not in the current catalog"
+        if metric not in metrics:
+            return f"{section}: unexpected column {metric!r}"
+        if value not in metrics[metric]:
+            return f"{section}: {topic!r} {metric} = {value!r} is out of range"
+    return None
+
+
+def _init_worker(catalog_path):
+    # catalog_path = None：只解析不驗證 (aggregate.py 讀取資料夾時使用)
+    global _schema
+    _schema = build_schema(load_catalog_data(catalog_path)) if catalog_path else None
+
+
+def parse_file(path):
+    # 於 worker process 執行：回傳 (path, user_info, rows, error)
+    try:
+        user_info, rows = iter_workbook_rows(path)
+    except Exception as exc:
+        return path, None, None, f"{type(exc).__name__}: {exc}"
+    if _schema is None:
+        return path, user_info, rows, None
+    error = validate_rows(_schema, rows)
+    if error is None and not (user_info.get("Name") and user_info.get("Department")):
+        error = "missing Name/Department columns"
+    if error is not None:
+        return path, None, None, error
+    return path, user_info, rows, None
+
+
+def discover(root, pattern_suffix="_Result.xlsx"):
+    # 以 os.scandir 遞迴產生檔案路徑 (generator)，不一次載入整個清單
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(pattern_suffix) and not entry.name.startswith("~$"):
+                    yield entry.path
+
+
+def respondent_id(root, path):
+    rel = os.path.relpath(path, root).replace(os.sep, "/")
+    return "legacy-" + hashlib.sha1(rel.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_files(paths, workers=None, max_in_flight=None, catalog_path=CATALOG_PATH):
+    # 以 process pool 平行解析，依完成順序產生 parse_file 的結果 (順序與 paths 不同)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    paths = iter(paths)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(catalog_path,)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # 補滿處理中的工作，但不超過 max_in_flight
+            while not exhausted and len(pending) < max_in_flight:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(parse_file, path))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def _submit(store, campaign, rid, user_info, rows):
+    store.submit_respondent(campaign, rid, user_info)
+    store.submit_rows(campaign, rid, rows, replace_sections=tuple(SECTION_METRICS))
+
+
+def ingest(root, store, campaign, workers=None, max_in_flight=None, catalog_path=CATALOG_PATH, log=sys.stderr):
+    ok = failed = 0
+    started = last_report = time.perf_counter()
+
+    for path, user_info, rows, error in parse_files(discover(root), workers, max_in_flight, catalog_path):
+        if error is not None:
+            failed += 1
+            print(f"SKIP {path}: {error}", file=log)
+        else:
+            rid = respondent_id(root, path)
+            try:
+                _submit(store, campaign, rid, user_info, rows)
+            except StoreQueueFull:
+                # 解析比寫入快：等佇列清空後重送這個檔案
+                store.flush()
+                _submit(store, campaign, rid, user_info, rows)
+            ok += 1
+
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            print(f"... {ok + failed} files, {(ok + failed) / (now - started):.1f} files/s", file=log)
+
+    store.flush()
+    elapsed = time.perf_counter() - started
+    return ok, failed, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest legacy *_Result.xlsx workbooks into the response store.")
+    parser.add_argument("root", help="directory to scan (recursively) for *_Result.xlsx files")
+    parser.add_argument("--db", default=config.DB_PATH, help="SQLite response store (default: %(default)s)")
+    parser.add_argument("--campaign", default=config.CAMPAIGN, help="campaign key for the imported rows")
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPU count)")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help="catalog used for validation")
+    args = parser.parse_args(argv)
+
+    store = ResponseStore(args.db)
+    try:
+        ok, failed, elapsed = ingest(args.root, store, args.campaign, workers=args.workers, catalog_path=args.catalog)
+    finally:
+        store.close()
+    total = ok + failed
+    rate = total / elapsed if elapsed else 0.0
+    print(f"Ingested {ok} files ({failed} skipped) in {elapsed:.2f}s: {rate:.1f} files/s -> {args.db}")
+    return 1 if failed and not ok else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
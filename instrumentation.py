@@ -0,0 +1,345 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import Counter
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+# st.rerun() / st.stop() 的控制流程例外在 Streamlit 內部模組中，位置隨版本變動；都找不到時以類別名稱判斷
+try:
+    from streamlit.runtime.scriptrunner_utils.exceptions import ScriptControlException
+except ImportError:
+    try:
+        from streamlit.runtime.scriptrunner.exceptions import ScriptControlException
+    except ImportError:
+        ScriptControlException = None
+
+CONTROL_FLOW_EXCEPTIONS = ("RerunException", "StopException")
+
+# =================================================================================================
+# 效能量測 (預設停用)
+# - instrument_methods 包裝 run() / render_* / generate_excel：記錄每次呼叫的耗時 (histogram)，
+#   run() 另記錄每次 rerun 的 widget 數量與 session_state 大小
+# - 以 Prometheus 文字格式輸出：127.0.0.1:<SA_METRICS_PORT>/metrics 或定期寫入 SA_METRICS_FILE
+# - SA_PROFILE_SLOW_MS > 0 時啟用取樣 profiler：rerun 期間定時取樣 script thread 的 call stack，
+#   超過門檻的 rerun 以 folded stacks (flamegraph.pl / speedscope 可讀) 寫入 SA_PROFILE_DIR
+# 停用時 instrument_methods 不做任何包裝，執行路徑與未加入量測時完全相同
+# =================================================================================================
+
+ENABLED = config.METRICS_ENABLED or config.PROFILE_SLOW_MS > 0
+
+# 秒；涵蓋一般 widget rerun (數十 ms) 到產生報告 / 完成頁 (數秒)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WIDGET_BUCKETS = (10, 25, 50, 100, 200, 400, 800)
+STATE_BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 由其他模組更新的計數器 / gauge (例如 session_memory、jobs)；不受 ENABLED 影響，只是記憶體中的數字
+COUNTERS = {
+    "sa_session_keys_released_total": "Session state keys released after their step was committed.",
+    "sa_session_budget_evictions_total": "Reruns whose session state exceeded SA_SESSION_BUDGET_KB.",
+    "sa_session_over_budget_total": "Reruns still over SA_SESSION_BUDGET_KB after cleanup.",
+    "sa_jobs_submitted_total": "Background jobs submitted (reports).",
+    "sa_jobs_rejected_total": "Background jobs rejected because SA_JOB_QUEUE was full.",
+    "sa_jobs_failed_total": "Background jobs that raised or were cancelled.",
+    "sa_submissions_deduplicated_total": "Replayed submissions dropped before reaching the result store.",
+    "sa_sessions_admitted_total": "Sessions admitted to the assessment.",
+    "sa_sessions_queued_total": "Sessions sent to the waiting room because SA_MAX_SESSIONS was reached.",
+    "sa_sessions_expired_total": "Admitted sessions released after SA_SESSION_IDLE seconds without a rerun.",
+    "sa_sessions_readmitted_total": "Idle-expired sessions that came back and were readmitted without queueing.",
+    "sa_reruns_throttled_total": "Reruns stopped by the per-session rate limit (SA_RERUN_RATE).",
+}
+GAUGES = {
+    "sa_jobs_pending": "Background jobs queued or running.",
+    "sa_sessions_active": "Sessions currently holding an admission slot.",
+    "sa_sessions_waiting": "Sessions in the waiting room.",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        out = []
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{{{labels}le="{bound:g}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.total:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class Metrics:
+    # 整個 process 共用；observe 只在鎖內更新數字
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._widgets = Histogram(WIDGET_BUCKETS)
+        self._state_bytes = Histogram(STATE_BYTES_BUCKETS)
+        self._errors = Counter()
+        self._counters = Counter()
+        self._gauges = Counter()
+        self._slow_profiles = 0
+
+    def observe_call(self, method, seconds, error=False):
+        with self._lock:
+            hist = self._durations.get(method)
+            if hist is None:
+                hist = self._durations[method] = Histogram(DURATION_BUCKETS)
+            hist.observe(seconds)
+            if error:
+                self._errors[method] += 1
+
+    def observe_rerun(self, widgets, state_bytes):
+        with self._lock:
+            if widgets is not None:
+                self._widgets.observe(widgets)
+            self._state_bytes.observe(state_bytes)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def count_profile(self):
+        with self._lock:
+            self._slow_profiles += 1
+
+    def render(self):
+        with self._lock:
+            lines = [
+                "# HELP sa_method_duration_seconds Wall time of instrumented app methods.",
+                "# TYPE sa_method_duration_seconds histogram",
+            ]
+            for method, hist in sorted(self._durations.items()):
+                lines += hist.lines("sa_method_duration_seconds", f'method="{method}",')
+            lines += [
+                "# HELP sa_method_errors_total Exceptions raised by instrumented app methods.",
+                "# TYPE sa_method_errors_total counter",
+            ]
+            lines += [f'sa_method_errors_total{{method="{m}"}} {n}' for m, n in sorted(self._errors.items())]
+            lines += [
+                "# HELP sa_rerun_widgets Widgets registered per full rerun.",
+                "# TYPE sa_rerun_widgets histogram",
+            ]
+            lines += self._widgets.lines("sa_rerun_widgets", "")
+            lines += [
+                "# HELP sa_session_state_bytes Pickled size of st.session_state after each full rerun.",
+                "# TYPE sa_session_state_bytes histogram",
+            ]
+            lines += self._state_bytes.lines("sa_session_state_bytes", "")
+            lines += [
+                "# HELP sa_slow_rerun_profiles_total Folded-stack profiles written for slow reruns.",
+                "# TYPE sa_slow_rerun_profiles_total counter",
+                f"sa_slow_rerun_profiles_total {self._slow_profiles}",
+            ]
+            for name, help_text in COUNTERS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {self._counters[name]}"]
+            for name, help_text in GAUGES.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {self._gauges[name]:g}"]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# --- 取樣 profiler ---
+class SamplingProfiler:
+    # 單一背景執行緒，每 interval 秒取樣所有「正在量測中」的 script thread
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name="sa-sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def start(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, Counter())
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_folded(frame)] += 1
+
+
+def _folded(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def write_profile(stacks, name, elapsed):
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    path = os.path.join(config.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{elapsed * 1000:.0f}ms.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    metrics.count_profile()
+    return path
+
+
+# --- 每次 rerun 的 widget 數量與 session_state 大小 ---
+def _widget_count():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    ids = getattr(getattr(ctx, "shared", ctx), "widget_ids_this_run", None)
+    if ids is None:
+        return None
+    return len(ids.snapshot()) if hasattr(ids, "snapshot") else len(ids)
+
+
+def state_bytes(state):
+    total = 0
+    for key in state:
+        try:
+            total += len(pickle.dumps(state[key], protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            total += sys.getsizeof(state[key])
+    return total
+
+
+# --- 包裝 ---
+_profiler = None
+
+
+def instrument_methods(cls, names):
+    # 停用時直接返回，不替換任何方法
+    global _profiler
+    # jobs.py 的 worker process (spawn) 會重新載入 __main__ (app.py)，只在 server process 量測 / 輸出
+    if not ENABLED or multiprocessing.current_process().name != "MainProcess":
+        return cls
+    if config.PROFILE_SLOW_MS > 0 and _profiler is None:
+        _profiler = SamplingProfiler(config.PROFILE_INTERVAL_MS / 1000)
+    for name in names:
+        setattr(cls, name, _timed(getattr(cls, name), name, rerun=name == "run"))
+    start_exporters()
+    return cls
+
+
+def _is_control_flow(exc):
+    if ScriptControlException is not None:
+        return isinstance(exc, ScriptControlException)
+    return type(exc).__name__ in CONTROL_FLOW_EXCEPTIONS
+
+
+def _timed(fn, name, rerun=False):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        import streamlit as st
+
+        profiling = rerun and _profiler is not None
+        if profiling:
+            _profiler.start(threading.get_ident())
+        started = time.perf_counter()
+        error = False
+        try:
+            return fn(*args, **kwargs)
+        except BaseException as exc:
+            # st.rerun() / st.stop() 以例外控制流程，不算錯誤
+            error = not _is_control_flow(exc)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.observe_call(name, elapsed, error)
+            if rerun:
+                metrics.observe_rerun(_widget_count(), state_bytes(st.session_state))
+            if profiling:
+                stacks = _profiler.stop(threading.get_ident())
+                if elapsed * 1000 >= config.PROFILE_SLOW_MS and stacks:
+                    path = write_profile(stacks, f"step{st.session_state.get('step', 'x')}", elapsed)
+                    logger.info("Slow rerun (%.0f ms) profile written to %s", elapsed * 1000, path)
+
+    return wrapper
+
+
+# --- 輸出 ---
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_file_loop(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(metrics.render())
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("Failed to write metrics to %s", path)
+
+
+def start_exporters():
+    # 每個 process 只啟動一次 (Streamlit 每次 rerun 都會重新執行 app.py)
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started or not config.METRICS_ENABLED:
+            return
+        _exporters_started = True
+        if config.METRICS_PORT:
+            server = ThreadingHTTPServer(("127.0.0.1", config.METRICS_PORT), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="sa-metrics-http", daemon=True).start()
+        if config.METRICS_FILE:
+            threading.Thread(
+                target=_write_file_loop, args=(config.METRICS_FILE, config.METRICS_FILE_INTERVAL),
+                name="sa-metrics-file", daemon=True,
+            ).start()
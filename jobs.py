@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from instrumentation import metrics
+
+# =================================================================================================
+# 背景工作佇列 (報告產生等 CPU 密集工作)
+# - Streamlit script thread 只送出工作並取得 Job handle 即返回，完成頁以 fragment 定時查詢狀態
+# - 預設使用 process pool：產生 xlsx 是純 Python 的 CPU 工作，放在 thread 中仍會搶 GIL，
+#   多人同時完成時會拖慢其他 session 的 rerun；process pool 只佔用 SA_JOB_WORKERS 個核心
+# - 佇列有上限 (SA_JOB_QUEUE)：排隊中的工作已滿時 submit 丟出 JobQueueFull，由呼叫端稍後重試
+# - 以 key 去除重複：同一份內容 (例如同一份報告的雜湊) 在排隊或執行中時回傳同一個 Job
+# - worker process 異常結束 (OOM 等) 會讓整個 pool 進入 broken 狀態：submit 時重建 pool 並重試一次，
+#   仍失敗才丟出 BrokenExecutor，由呼叫端改在當下產生
+# 整個 process 共用一個實例 (由 app.py 以 st.cache_resource 建立)
+# =================================================================================================
+
+JOB_EXECUTORS = ("process", "thread")
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    # handle 只記錄狀態；結果交給 on_done (例如放進有總量上限的報告快取) 後即釋放，不隨 handle 保留
+    __slots__ = ("key", "future", "outcome", "submitted_at", "finished_at", "_finished")
+
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+        self.outcome = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self._finished = threading.Event()
+
+    @property
+    def status(self):
+        # queued -> running -> done / failed
+        if self.outcome is not None:
+            return self.outcome
+        future = self.future
+        return "running" if future is None or future.running() or future.done() else "queued"
+
+    def done(self):
+        return self.outcome is not None
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+
+class JobQueue:
+    def __init__(self, max_workers=2, max_pending=64, executor="process", keep_finished=1000):
+        if executor not in JOB_EXECUTORS:
+            raise ValueError(f"executor must be one of {JOB_EXECUTORS}, got {executor!r}")
+        self.executor = executor
+        self.max_workers = max_workers
+        self._executor = self._new_executor()
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._pending
+
+    def _new_executor(self):
+        if self.executor == "process":
+            # Streamlit server 有多個執行緒，fork 可能複製到持有中的鎖，一律以 spawn 啟動 worker
+            return ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return ThreadPoolExecutor(self.max_workers, thread_name_prefix="sa-job")
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key, fn, *args, on_done=None):
+        # on_done(result) 於工作完成後在背景執行緒呼叫 (例如放進報告快取)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "failed":
+                self._jobs.move_to_end(key)
+                return job
+            if self._pending >= self.max_pending:
+                metrics.count("sa_jobs_rejected_total")
+                raise JobQueueFull(f"{self._pending} jobs already pending")
+            try:
+                future = self._executor.submit(fn, *args)
+            except BrokenExecutor:
+                # pool 已損壞 (worker 異常結束)：排隊中的工作已由 pool 標記為失敗，換一個新的 pool 重試一次
+                logger.warning("Job executor is broken, starting a new one")
+                metrics.count("sa_jobs_executor_restarts_total")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+                future = self._executor.submit(fn, *args)
+            job = self._jobs[key] = Job(key, future)
+            self._pending += 1
+            metrics.gauge("sa_jobs_pending", self._pending)
+            self._trim()
+        metrics.count("sa_jobs_submitted_total")
+        job.future.add_done_callback(lambda future: self._finish(job, on_done))
+        return job
+
+    def _finish(self, job, on_done):
+        future = job.future
+        outcome = "done"
+        if future.cancelled():
+            outcome = "failed"
+        elif future.exception() is not None:
+            outcome = "failed"
+            logger.error("Background job %s failed", job.key, exc_info=future.exception())
+        elif on_done is not None:
+            try:
+                on_done(future.result())
+            except Exception:
+                outcome = "failed"
+                logger.exception("Completion callback of background job %s failed", job.key)
+        if outcome == "failed":
+            metrics.count("sa_jobs_failed_total")
+        # 從送出到完成的時間 (含排隊)，與 render_* 的執行時間一起輸出
+        metrics.observe_call("background_job", time.time() - job.submitted_at, outcome == "failed")
+        with self._lock:
+            self._pending -= 1
+            metrics.gauge("sa_jobs_pending", self._pending)
+        job.future = None
+        job.finished_at = time.time()
+        job.outcome = outcome
+        job._finished.set()
+
+    def _trim(self):
+        # 只保留最近 keep_finished 個已完成的 handle；未完成的工作不移除
+        excess = len(self._jobs) - self.keep_finished - self._pending
+        for key in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[key].done():
+                del self._jobs[key]
+                excess -= 1
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,47 @@
+import importlib
+import threading
+
+# =================================================================================================
+# 延遲載入 (加快冷啟動)
+# 語言、基本資料步驟 (step 0 / 1) 不需要 NumPy / pandas / Excel 套件；模組層級以 lazy_import 取得代理物件，
+# 第一次存取屬性 (例如 np.zeros、pd.DataFrame) 時才真正 import，之後直接轉交給實際的模組
+# 用法與一般 import 相同：np = lazy_import("numpy")
+# 只用在模組層級的別名；需要 from ... import 的單一名稱 (例如 openpyxl.load_workbook) 改在函式內 import
+# =================================================================================================
+
+
+class LazyModule:
+    __slots__ = ("_name", "_module", "_lock")
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            # 多個 script thread 可能同時第一次存取；import 本身有鎖，這裡只避免重複設定
+            with self._lock:
+                module = self._module
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
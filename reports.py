@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from charts import add_workbook_charts
+from lazy import lazy_import
+from results import STATUS_CODES, STEPS
+
+pd = lazy_import("pandas")
+
+# =================================================================================================
+# Excel 結果報告
+# - build_workbook: 產生單一填答者的 xlsx (Stakeholder / Materiality / TCFD / HRDD 四個工作表，另可附 Charts 工作表)
+# - ReportCache: 以「作答結果 (ResponseRecord) + user_info」的內容雜湊為鍵，快取產生好的 xlsx bytes，
+#   依總位元組數做 LRU 淘汰，完成頁重跑或多人同時完成時不重複產生
+# =================================================================================================
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# (工作表名稱, 是否輸出 index)；Stakeholder 以利害關係人為 index
+REPORT_SHEETS = (("Stakeholder", True), ("Materiality", False), ("TCFD", False), ("HRDD", False))
+
+
+def report_key(record, user_info, steps=STEPS):
+    # ResponseRecord 的 bytes 已包含題庫版本與所有分數；steps 為報告包含的步驟 (依活動設定)
+    h = hashlib.sha256(record.to_bytes())
+    h.update(json.dumps([user_info, list(steps)], sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_workbook(frames, user_info, chart_data=None):
+    output = io.BytesIO()
+    writer = pd.ExcelWriter(output, engine='xlsxwriter')
+    name_col = "Name"
+    dept_col = "Department"
+
+    for df, (sheet_name, with_index) in zip(frames, REPORT_SHEETS):
+        # 活動未啟用的步驟沒有工作表
+        if df is None:
+            continue
+        df = df.copy()
+        df.insert(0, dept_col, user_info["Department"])
+        df.insert(0, name_col, user_info["Name"])
+        df.to_excel(writer, sheet_name=sheet_name, index=with_index)
+
+    # 圖表以 Excel 原生圖表嵌入 (與完成頁使用同一份圖表資料)
+    if chart_data:
+        add_workbook_charts(writer.book, chart_data)
+
+    writer.close()
+    return output.getvalue()
+
+
+class ReportCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old)
+            # 單一報告超過上限時不快取
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def get_or_build(self, key, build):
+        data = self.get(key)
+        if data is None:
+            data = build()
+            self.put(key, data)
+        return data
+
+
+# --- 讀回既有的結果報告 (build_workbook 產生的格式) ---
+def iter_workbook_rows(path):
+    # 以 openpyxl read-only 串流讀取，回傳 (user_info, rows)
+    # rows 為 (section, topic, metric, value) 長表格，格式與 ResponseRecord.rows 相同
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    user_info = {}
+    rows = []
+    try:
+        for sheet_name, with_index in REPORT_SHEETS:
+            if sheet_name not in wb.sheetnames:
+                continue
+            ws = wb[sheet_name]
+            values = ws.iter_rows(values_only=True)
+            header = next(values, None)
+            if header is None:
+                continue
+            header = list(header)
+            if with_index:
+                header[0] = "Topic"
+            for record in values:
+                rec = dict(zip(header, record))
+                if rec.get("Topic") is None:
+                    continue
+                name = rec.pop("Name", None)
+                department = rec.pop("Department", None)
+                user_info.setdefault("Name", name)
+                user_info.setdefault("Department", department)
+                topic = str(rec.pop("Topic"))
+                if sheet_name == "TCFD":
+                    section = "tcfd_opp" if rec.pop("Type") == "Opportunity" else "tcfd_risk"
+                else:
+                    section = sheet_name.lower()
+                if "Status" in rec:
+                    rec["Status"] = STATUS_CODES[rec["Status"]]
+                rows.extend((section, topic, metric, int(value)) for metric, value in rec.items() if metric)
+    finally:
+        wb.close()
+    return user_info, rows
@@ -0,0 +1,329 @@
+import argparse
+import logging
+import queue
+import socket
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import unquote, urlsplit
+
+# =================================================================================================
+# Redis 相容 (RESP2) 的最小用戶端與本機替代伺服器
+# - RespClient：只用 socket 實作，不需要安裝 redis 套件；連線池 + pipeline (一次送出多個指令、一次讀回)
+#   網址格式 redis://[:password@]host:port/db
+# - RespServer：開發 / 單機部署用的替代伺服器，只支援 drafts.RedisDraftStore 用到的指令
+#   (字串、hash、TTL)，資料只在記憶體中；正式環境指向真正的 Redis / Valkey 即可
+# 啟動本機替代伺服器：python resp.py [--host 127.0.0.1] [--port 6379]
+# =================================================================================================
+
+DEFAULT_URL = "redis://127.0.0.1:6379/0"
+
+logger = logging.getLogger(__name__)
+
+
+class RespError(Exception):
+    pass
+
+
+# --- 編碼 / 解碼 ---
+def _bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def encode_command(args):
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        arg = _bytes(arg)
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+def read_reply(f):
+    # 錯誤回覆以 RespError 實例回傳 (pipeline 中不中斷其他回覆的讀取)
+    line = f.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        return RespError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        n = int(rest)
+        if n < 0:
+            return None
+        data = f.read(n + 2)
+        return data[:-2]
+    if kind == b"*":
+        n = int(rest)
+        if n < 0:
+            return None
+        return [read_reply(f) for _ in range(n)]
+    raise RespError(f"unexpected reply type {kind!r}")
+
+
+# --- 用戶端 ---
+class _Connection:
+    __slots__ = ("sock", "file")
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+
+    def call(self, commands):
+        self.sock.sendall(b"".join(encode_command(args) for args in commands))
+        return [read_reply(self.file) for _ in commands]
+
+    def close(self):
+        try:
+            self.file.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RespClient:
+    def __init__(self, url=DEFAULT_URL, pool_size=8, timeout=5.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported URL scheme: {url!r}")
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip("/") or 0)
+        self.timeout = timeout
+        # 連線在需要時才建立，用完放回 (最多保留 pool_size 條)
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        conn = _Connection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        for reply in conn.call(setup) if setup else ():
+            if isinstance(reply, RespError):
+                conn.close()
+                raise reply
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        except BaseException:
+            # 連線狀態不明 (可能只讀到一半的回覆)，不放回連線池
+            conn.close()
+            raise
+        else:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def pipeline(self, commands):
+        # 回傳各指令的回覆 (錯誤為 RespError 實例)；連線中斷時以新連線重試一次
+        for attempt in (0, 1):
+            try:
+                with self.connection() as conn:
+                    return conn.call(commands)
+            except (OSError, ConnectionError):
+                if attempt:
+                    raise
+
+    def execute(self, *args):
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# --- 本機替代伺服器 ---
+class _Keyspace:
+    # key -> (value, expires_at)；value 為 bytes (字串) 或 dict (hash)；過期的 key 在存取時移除
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def _sweep(self, now):
+        # 每 1000 次寫入清除一次過期的 key，避免從未再讀取的 key 佔用記憶體
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            for key in [key for key, (_, expires) in self._data.items() if expires is not None and expires <= now]:
+                del self._data[key]
+
+    def command(self, name, args):
+        now = time.time()
+        with self._lock:
+            handler = getattr(self, f"_cmd_{name}", None)
+            if handler is None:
+                return RespError(f"ERR unknown command '{name}'")
+            try:
+                return handler(args, now)
+            except (IndexError, ValueError):
+                return RespError(f"ERR wrong arguments for '{name}' command")
+            except (AttributeError, TypeError):
+                # 例如對字串 key 執行 hash 指令
+                return RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+
+    def _cmd_ping(self, args, now):
+        return args[0] if args else "PONG"
+
+    def _cmd_auth(self, args, now):
+        return "OK"
+
+    def _cmd_select(self, args, now):
+        return "OK"
+
+    def _cmd_get(self, args, now):
+        item = self._live(args[0], now)
+        if item is not None and not isinstance(item[0], bytes):
+            return RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return item[0] if item else None
+
+    def _cmd_set(self, args, now):
+        key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+        expires = None
+        if b"EX" in options:
+            expires = now + int(args[2 + options.index(b"EX") + 1])
+        self._data[key] = (value, expires)
+        self._sweep(now)
+        return "OK"
+
+    def _cmd_del(self, args, now):
+        return sum(self._data.pop(key, None) is not None for key in args)
+
+    def _cmd_exists(self, args, now):
+        return sum(self._live(key, now) is not None for key in args)
+
+    def _cmd_expire(self, args, now):
+        item = self._live(args[0], now)
+        if item is None:
+            return 0
+        self._data[args[0]] = (item[0], now + int(args[1]))
+        return 1
+
+    def _cmd_ttl(self, args, now):
+        item = self._live(args[0], now)
+        if item is None:
+            return -2
+        return -1 if item[1] is None else int(item[1] - now)
+
+    def _cmd_hset(self, args, now):
+        key, pairs = args[0], args[1:]
+        if not pairs or len(pairs) % 2:
+            raise ValueError
+        item = self._live(key, now)
+        if item is None:
+            item = self._data[key] = ({}, None)
+        elif not isinstance(item[0], dict):
+            return RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        fields = item[0]
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        self._sweep(now)
+        return added
+
+    def _cmd_hget(self, args, now):
+        item = self._live(args[0], now)
+        return item[0].get(args[1]) if item else None
+
+    def _cmd_hgetall(self, args, now):
+        item = self._live(args[0], now)
+        if item is None:
+            return []
+        return [x for pair in item[0].items() for x in pair]
+
+    def _cmd_dbsize(self, args, now):
+        return len(self._data)
+
+    def _cmd_flushdb(self, args, now):
+        self._data.clear()
+        return "OK"
+
+
+def _encode_reply(value):
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % _bytes(value)
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(v) for v in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # 每個回覆各自送出 (pipeline 中的多個指令)，關閉 Nagle 避免與用戶端的 delayed ACK 互相等待
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        keyspace = self.server.keyspace
+        while True:
+            try:
+                request = read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(request, list) or not request:
+                self.wfile.write(b"-ERR protocol error\r\n")
+                return
+            name = request[0].decode("utf-8", "replace").lower()
+            self.wfile.write(_encode_reply(keyspace.command(name, request[1:])))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=6379):
+        self.keyspace = _Keyspace()
+        super().__init__((host, port), _RespHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local RESP (Redis-compatible) stand-in for shared drafts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = RespServer(args.host, args.port)
+    logger.info("RESP stand-in listening on %s:%d (in-memory, not persisted)", args.host, server.server_address[1])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
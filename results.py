@@ -0,0 +1,217 @@
+import hashlib
+import struct
+from functools import lru_cache
+
+from idempotency import content_digest
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# =================================================================================================
+# 精簡作答結果 (ResponseRecord)
+# 所有分數都是 1-5 的小整數，且議題集合固定 -> 以題庫中的位置為索引，存成 uint8 陣列
+# - stakeholder : (利害關係人數, 5)
+# - materiality : (重大性議題數, 5) 欄位 = Status, Opp Value, Opp Prob, Risk Impact, Risk Prob；0 = 未選
+# - tcfd        : (機會數 + 風險數, 2) 欄位 = Severity/Value, Likelihood；機會在前
+# - hrdd        : (HRDD 議題數, 2) 欄位 = Severity, Probability
+# - hrdd_chain  : Supplier / Customer 價值鏈勾選，以 np.packbits 壓縮
+# 0 代表尚未作答；輸出成 DataFrame / 長表格 / bytes 時不需重新整理資料
+# =================================================================================================
+
+# Materiality Status 以整數存放
+STATUS_CODES = {"Actual": 1, "Potential": 2}
+STATUS_NAMES = {v: k for k, v in STATUS_CODES.items()}
+
+MAT_METRICS = ("Status", "Opp Value Creation", "Opp Probability", "Risk Impact", "Risk Probability")
+TCFD_METRICS = ("Severity/Value", "Likelihood")
+HRDD_METRICS = ("Severity", "Probability")
+HRDD_CHAIN_METRICS = ("Supplier (Value Chain)", "Customer (Value Chain)")
+
+STEPS = ("stakeholder", "materiality", "tcfd", "hrdd")
+# app.py 的頁面編號 (0 = 語言、1 = 基本資料、6 = 完成頁)
+STEP_NUMBERS = {"stakeholder": 2, "materiality": 3, "tcfd": 4, "hrdd": 5}
+# 各步驟 rows() 產生的 section (重新提交時先清除這些 section 的舊資料)
+STEP_SECTIONS = {
+    "stakeholder": ("stakeholder",),
+    "materiality": ("materiality",),
+    "tcfd": ("tcfd_opp", "tcfd_risk"),
+    "hrdd": ("hrdd",),
+}
+
+# to_bytes 標頭：格式版本 + 題庫版本長度
+_HEADER = struct.Struct("<BH")
+_FORMAT = 1
+
+
+class ResultLayout:
+    # 由題庫決定的陣列形狀與列名稱 (每個題庫版本只建立一次)
+    def __init__(self, catalog):
+        self.version = catalog.version
+        self.sh_rows = tuple(catalog.sh_rows["en"])
+        self.sh_cols = tuple(catalog.sh_col_keys)
+        self.mat_keys = tuple(catalog.mat_topic_keys)
+        self.mat_titles = np.array([catalog.mat_topic_data[k]["en"] for k in self.mat_keys], dtype=object)
+        self.mat_index = {key: i for i, key in enumerate(self.mat_keys)}
+        opp = [(key, info["en"]) for key, info in catalog.tcfd_opp_data.items()]
+        risk = [(key, info["en"]) for key, info in catalog.tcfd_risk_data.items()]
+        self.n_tcfd_opp = len(opp)
+        # TCFD widget key：機會 tcfd_o*_<key>，風險 tcfd_r*_<key>
+        self.tcfd_keys = tuple([("o", key) for key, _ in opp] + [("r", key) for key, _ in risk])
+        self.tcfd_titles = np.array([title for _, title in opp + risk], dtype=object)
+        self.tcfd_types = np.array(["Opportunity"] * len(opp) + ["Risk"] * len(risk), dtype=object)
+        self.hrdd_keys = tuple(catalog.hrdd_topic_data.keys())
+        self.hrdd_titles = np.array([info["en"] for info in catalog.hrdd_topic_data.values()], dtype=object)
+
+    def shapes(self):
+        return {
+            "stakeholder": (len(self.sh_rows), len(self.sh_cols)),
+            "materiality": (len(self.mat_keys), len(MAT_METRICS)),
+            "tcfd": (len(self.tcfd_keys), len(TCFD_METRICS)),
+            "hrdd": (len(self.hrdd_keys), len(HRDD_METRICS)),
+        }
+
+
+@lru_cache(maxsize=8)
+def get_layout(catalog):
+    return ResultLayout(catalog)
+
+
+class ResponseRecord:
+    __slots__ = ("layout", "stakeholder", "materiality", "tcfd", "hrdd", "hrdd_chain")
+
+    def __init__(self, layout):
+        self.layout = layout
+        shapes = layout.shapes()
+        self.stakeholder = np.zeros(shapes["stakeholder"], dtype=np.uint8)
+        self.materiality = np.zeros(shapes["materiality"], dtype=np.uint8)
+        self.tcfd = np.zeros(shapes["tcfd"], dtype=np.uint8)
+        self.hrdd = np.zeros(shapes["hrdd"], dtype=np.uint8)
+        self.hrdd_chain = np.zeros((len(layout.hrdd_keys) * len(HRDD_CHAIN_METRICS) + 7) // 8, dtype=np.uint8)
+
+    # --- 狀態 ---
+    def completed(self, step):
+        if step == "hrdd":
+            return bool(self.hrdd.all())
+        if step == "materiality":
+            return bool(self.materiality[:, 0].any())
+        return bool(getattr(self, step).all())
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__[1:])
+
+    def set_hrdd_chain(self, flags):
+        self.hrdd_chain = np.packbits(np.asarray(flags, dtype=bool).ravel())
+
+    def hrdd_chain_flags(self):
+        n = len(self.layout.hrdd_keys) * len(HRDD_CHAIN_METRICS)
+        return np.unpackbits(self.hrdd_chain, count=n).reshape(-1, len(HRDD_CHAIN_METRICS)).astype(bool)
+
+    # --- 輸出：DataFrame (與原本各步驟結果的欄位相同) ---
+    def frame(self, step):
+        layout = self.layout
+        if step == "stakeholder":
+            return pd.DataFrame(self.stakeholder, index=list(layout.sh_rows), columns=list(layout.sh_cols), copy=False)
+        if step == "materiality":
+            selected = self.materiality[:, 0] != 0
+            mat = self.materiality[selected]
+            df = pd.DataFrame(mat[:, 1:], columns=list(MAT_METRICS[1:]), copy=False)
+            df.insert(0, "Status", np.where(mat[:, 0] == STATUS_CODES["Actual"], "Actual", "Potential"))
+            df.insert(0, "Topic", layout.mat_titles[selected])
+            return df
+        if step == "tcfd":
+            df = pd.DataFrame(self.tcfd, columns=list(TCFD_METRICS), copy=False)
+            df.insert(0, "Topic", layout.tcfd_titles)
+            df.insert(0, "Type", layout.tcfd_types)
+            return df
+        if step == "hrdd":
+            df = pd.DataFrame(self.hrdd, columns=list(HRDD_METRICS), copy=False)
+            chain = self.hrdd_chain_flags().view(np.uint8)
+            for i, name in enumerate(HRDD_CHAIN_METRICS):
+                df[name] = chain[:, i]
+            df.insert(0, "Topic", layout.hrdd_titles)
+            return df
+        raise ValueError(f"Unknown step: {step!r}")
+
+    def to_frames(self, steps=STEPS):
+        # 未包含的步驟為 None (例如活動未啟用的步驟)
+        return tuple(self.frame(step) if step in steps else None for step in STEPS)
+
+    # --- 輸出：(section, topic, metric, value) 長表格 (ResponseStore 使用) ---
+    def rows(self, step):
+        layout = self.layout
+        if step == "stakeholder":
+            return _long_rows("stakeholder", layout.sh_rows, layout.sh_cols, self.stakeholder)
+        if step == "materiality":
+            selected = self.materiality[:, 0] != 0
+            return _long_rows("materiality", layout.mat_titles[selected], MAT_METRICS, self.materiality[selected])
+        if step == "tcfd":
+            n = layout.n_tcfd_opp
+            return (
+                _long_rows("tcfd_opp", layout.tcfd_titles[:n], TCFD_METRICS, self.tcfd[:n])
+                + _long_rows("tcfd_risk", layout.tcfd_titles[n:], TCFD_METRICS, self.tcfd[n:])
+            )
+        if step == "hrdd":
+            values = np.hstack([self.hrdd, self.hrdd_chain_flags().view(np.uint8)])
+            return _long_rows("hrdd", layout.hrdd_titles, HRDD_METRICS + HRDD_CHAIN_METRICS, values)
+        raise ValueError(f"Unknown step: {step!r}")
+
+    # --- 序列化 ---
+    def to_bytes(self):
+        version = self.layout.version.encode("utf-8")
+        return b"".join([
+            _HEADER.pack(_FORMAT, len(version)), version,
+            self.stakeholder.tobytes(), self.materiality.tobytes(), self.tcfd.tobytes(),
+            self.hrdd.tobytes(), self.hrdd_chain.tobytes(),
+        ])
+
+    @classmethod
+    def from_bytes(cls, layout, data):
+        fmt, n_version = _HEADER.unpack_from(data)
+        version = bytes(data[_HEADER.size:_HEADER.size + n_version]).decode("utf-8")
+        if fmt != _FORMAT or version != layout.version:
+            raise ValueError(f"Record was saved with catalog {version!r} (format {fmt}), expected {layout.version!r}")
+        record = cls(layout)
+        offset = _HEADER.size + n_version
+        for name in cls.__slots__[1:]:
+            arr = getattr(record, name)
+            setattr(record, name, np.frombuffer(data, dtype=np.uint8, count=arr.size, offset=offset).reshape(arr.shape).copy())
+            offset += arr.size
+        return record
+
+    def digest(self):
+        return hashlib.sha256(self.to_bytes()).hexdigest()
+
+    def step_digest(self, step):
+        # 單一步驟作答內容的雜湊 (提交去重用，見 idempotency.py)；題庫版本不同時視為不同內容
+        arrays = {
+            "stakeholder": (self.stakeholder,),
+            "materiality": (self.materiality,),
+            "tcfd": (self.tcfd,),
+            "hrdd": (self.hrdd, self.hrdd_chain),
+        }[step]
+        return content_digest(self.layout.version, step, *(arr.tobytes() for arr in arrays))
+
+
+def _long_rows(section, topics, metrics, values):
+    n_topics, n_metrics = values.shape
+    topic_col = np.repeat(np.asarray(topics, dtype=object), n_metrics)
+    metric_col = np.tile(np.asarray(metrics, dtype=object), n_topics)
+    return list(zip([section] * values.size, topic_col.tolist(), metric_col.tolist(), values.ravel().tolist()))
+
+
+def batch_rows(section, respondents, topics, metrics, values, mask=None):
+    # 多位填答者的長表格 (api.py 批次提交)：values 為 (填答者數, 議題數, 指標數)，
+    # mask (填答者數, 議題數) 只輸出選入的議題 (例如重大性)；回傳 (respondent, section, topic, metric, value)
+    n_metrics = values.shape[-1]
+    if mask is None:
+        mask = np.ones(values.shape[:2], dtype=bool)
+    who, topic = np.nonzero(mask)
+    respondent_col = np.repeat(np.asarray(respondents, dtype=object)[who], n_metrics)
+    topic_col = np.repeat(np.asarray(topics, dtype=object)[topic], n_metrics)
+    metric_col = np.tile(np.asarray(metrics, dtype=object), who.size)
+    value_col = values[who, topic].astype(np.uint8).ravel()
+    return list(zip(
+        respondent_col.tolist(), [section] * value_col.size, topic_col.tolist(), metric_col.tolist(), value_col.tolist()
+    ))
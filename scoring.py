@@ -0,0 +1,184 @@
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# =================================================================================================
+# 風險 / 機會評分與熱度圖 (向量化)
+# 輸入為多位填答者堆疊而成的 uint8 陣列 (見 results.ResponseRecord)，形狀 (填答者數, 議題數, 指標數)；
+# 單一填答者即 n = 1。所有計算 (綜合分數、等級、象限、5×5 熱度圖、利害關係人顯著性) 都是整批 NumPy 運算，
+# 不逐列迴圈，完成頁與全組織報告共用同一套規則
+# 分數 0 代表未作答 (例如未選入的重大性議題)，不計入等級、象限與熱度圖
+# =================================================================================================
+
+SCALE = 5
+
+# 各框架的兩個評分軸：(陣列名稱, 議題範圍, 第一軸欄位, 第二軸欄位, 軸名稱)
+# 第一軸為影響 / 價值，第二軸為可能性；TCFD 機會在前 (results.ResultLayout.n_tcfd_opp)
+FRAMEWORKS = {
+    "materiality_opp": ("materiality", None, 1, 2, ("Opp Value Creation", "Opp Probability")),
+    "materiality_risk": ("materiality", None, 3, 4, ("Risk Impact", "Risk Probability")),
+    "tcfd_opp": ("tcfd", "opp", 0, 1, ("Severity/Value", "Likelihood")),
+    "tcfd_risk": ("tcfd", "risk", 0, 1, ("Severity/Value", "Likelihood")),
+    "hrdd": ("hrdd", None, 0, 1, ("Severity", "Probability")),
+}
+FRAMEWORK_LABELS = {
+    "materiality_opp": "Materiality (Opportunity)",
+    "materiality_risk": "Materiality (Risk)",
+    "tcfd_opp": "TCFD (Opportunity)",
+    "tcfd_risk": "TCFD (Risk)",
+    "hrdd": "HRDD",
+}
+# 長表格 (ResponseStore / aggregate) 中對應的 section
+FRAMEWORK_SECTIONS = {
+    "materiality_opp": "materiality",
+    "materiality_risk": "materiality",
+    "tcfd_opp": "tcfd_opp",
+    "tcfd_risk": "tcfd_risk",
+    "hrdd": "hrdd",
+}
+
+# 綜合分數 (乘積 1-25) 的等級門檻：< 8 Low、8-14 Medium、>= 15 High
+LEVELS = ("Low", "Medium", "High")
+PRODUCT_THRESHOLDS = (8, 15)
+
+# 象限：兩軸分別以 QUADRANT_MIDPOINT 區分高低 (>= 為高)；代碼 = 第一軸高 * 2 + 第二軸高
+QUADRANTS = ("Monitor", "Likely", "Severe", "Priority")
+QUADRANT_MIDPOINT = 3
+
+# 利害關係人顯著性 = 5 個 sh_col_keys 分數的 (加權) 平均，1-5
+SALIENCE = "Salience"
+SALIENCE_LABEL = "Stakeholder Salience"
+
+
+# --- 資料準備 ---
+def framework_axes(arrays, layout, framework):
+    # 回傳兩個評分軸 (n, 議題數) 與議題名稱
+    name, part, i, j, _ = FRAMEWORKS[framework]
+    values = arrays[name]
+    titles = {"materiality": layout.mat_titles, "tcfd": layout.tcfd_titles, "hrdd": layout.hrdd_titles}[name]
+    if part == "opp":
+        values, titles = values[:, :layout.n_tcfd_opp], titles[:layout.n_tcfd_opp]
+    elif part == "risk":
+        values, titles = values[:, layout.n_tcfd_opp:], titles[layout.n_tcfd_opp:]
+    return values[..., i], values[..., j], titles
+
+
+# --- 綜合分數 ---
+def product_score(a, b):
+    # 1-25；任一軸未作答為 0
+    return a.astype(np.uint8) * b.astype(np.uint8)
+
+
+def weighted_score(values, weights=None):
+    # 沿最後一軸加權平均 (權重自動正規化)；全部未作答為 0
+    values = np.asarray(values, dtype=np.float32)
+    if weights is None:
+        weights = np.ones(values.shape[-1], dtype=np.float32)
+    weights = np.asarray(weights, dtype=np.float32)
+    return values @ (weights / weights.sum())
+
+
+def score_levels(scores, thresholds=PRODUCT_THRESHOLDS):
+    # 0..len(thresholds)，未作答為 -1；分數只有 0-25，以查表取代逐元素比較
+    lut = np.digitize(np.arange(SCALE * SCALE + 1), thresholds).astype(np.int8)
+    lut[0] = -1
+    return lut[scores]
+
+
+def quadrants(a, b, midpoint=QUADRANT_MIDPOINT):
+    codes = ((a >= midpoint).astype(np.int8) << 1) | (b >= midpoint)
+    codes[(a == 0) | (b == 0)] = -1
+    return codes
+
+
+def rank_desc(scores):
+    # 沿最後一軸由高到低的名次 (1 起算)，同分時依題庫順序
+    # 排序鍵 = (25 - 分數) * 議題數 + 位置，各鍵唯一，不需 stable sort
+    n_topics = scores.shape[-1]
+    key = (SCALE * SCALE - scores.astype(np.int16)) * n_topics + np.arange(n_topics, dtype=np.int16)
+    order = np.argsort(key, axis=-1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, n_topics + 1), axis=-1)
+    return ranks
+
+
+# --- 熱度圖 ---
+def heatmap(a, b, per_topic=False):
+    # 5×5 次數：列 = 第一軸分數 1-5，欄 = 第二軸分數 1-5
+    # 以 6×6 (含 0 = 未作答) 一次 bincount 後去掉第 0 列 / 欄，不需建立遮罩
+    # per_topic=True 時回傳 (議題數, 5, 5)，鍵為 topic * 36 + cell
+    side = SCALE + 1
+    cells = np.asarray(a, dtype=np.uint8) * np.uint8(side) + np.asarray(b, dtype=np.uint8)
+    if not per_topic:
+        return np.bincount(cells.ravel(), minlength=side * side).reshape(side, side)[1:, 1:]
+    n_topics = cells.shape[-1]
+    flat = cells.astype(np.intp) + np.arange(n_topics, dtype=np.intp) * side * side
+    counts = np.bincount(flat.ravel(), minlength=n_topics * side * side)
+    return counts.reshape(n_topics, side, side)[:, 1:, 1:]
+
+
+# --- 利害關係人顯著性 ---
+def stakeholder_salience(stakeholder, weights=None):
+    # (n, 利害關係人數, 5 個 sh_col_keys) -> (n, 利害關係人數)
+    return weighted_score(stakeholder, weights)
+
+
+def salience_table(stakeholder, names, weights=None):
+    # 單一填答者 (利害關係人數, 5) -> 依顯著性由高到低排列 (同分依題庫順序)；未作答時回傳 None
+    salience = stakeholder_salience(stakeholder, weights)
+    answered = salience > 0
+    if not answered.any():
+        return None
+    order = np.argsort(-salience, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(1, len(order) + 1)
+    return pd.DataFrame({
+        "Framework": SALIENCE_LABEL,
+        "Topic": np.asarray(names, dtype=object)[answered],
+        "Score": salience[answered].round(2),
+        "Level": None,
+        "Quadrant": None,
+        "Rank": ranks[answered],
+    }).sort_values("Rank")
+
+
+# --- 整批評分 ---
+def score_batch(arrays, layout, thresholds=PRODUCT_THRESHOLDS, midpoint=QUADRANT_MIDPOINT):
+    # 回傳 {framework: {"titles", "score", "level", "quadrant", "rank", "heatmap"}}
+    results = {}
+    for framework in FRAMEWORKS:
+        a, b, titles = framework_axes(arrays, layout, framework)
+        score = product_score(a, b)
+        results[framework] = {
+            "titles": titles,
+            "score": score,
+            "level": score_levels(score, thresholds),
+            "quadrant": quadrants(a, b, midpoint),
+            "rank": rank_desc(score),
+            "heatmap": heatmap(a, b),
+        }
+    return results
+
+
+def score_table(record, top=None):
+    # 單一填答者的評分結果表 (完成頁 / 報告使用)
+    # 利害關係人顯著性在前，之後為各框架的風險 / 機會分數
+    arrays = {name: getattr(record, name)[np.newaxis] for name in ("stakeholder", "materiality", "tcfd", "hrdd")}
+    frames = []
+    salience = salience_table(record.stakeholder, record.layout.sh_rows)
+    if salience is not None:
+        frames.append(salience.head(top) if top else salience)
+    for framework, result in score_batch(arrays, record.layout).items():
+        score = result["score"][0]
+        answered = score > 0
+        frame = pd.DataFrame({
+            "Framework": FRAMEWORK_LABELS[framework],
+            "Topic": result["titles"][answered],
+            "Score": score[answered],
+            "Level": np.asarray(LEVELS, dtype=object)[result["level"][0][answered]],
+            "Quadrant": np.asarray(QUADRANTS, dtype=object)[result["quadrant"][0][answered]],
+            "Rank": result["rank"][0][answered],
+        })
+        frames.append(frame.sort_values("Rank").head(top) if top else frame.sort_values("Rank"))
+    return pd.concat(frames, ignore_index=True)
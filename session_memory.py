@@ -0,0 +1,94 @@
+import logging
+
+from drafts import is_draft_key
+from instrumentation import metrics, state_bytes
+from results import STEP_NUMBERS
+
+# =================================================================================================
+# Session 記憶體管理
+# 每個 session (瀏覽器分頁) 的 st.session_state 只保留「目前步驟」需要的狀態：
+# - 步驟送出後結果已寫入 ResponseRecord (uint8 陣列) 並交給 ResponseStore，該步驟的 widget key 與
+#   草稿比對用的副本 (draft_saved) 隨即釋放；返回上一步時由 ResponseRecord 還原預設值
+# - 續填時只還原尚未完成步驟的 widget 值，已完成的步驟直接重建為 ResponseRecord
+# - rerun 結束時檢查 session_state 大小，超過 SA_SESSION_BUDGET_KB 時依序釋放可重建的狀態；
+#   檢查需要 pickle 整個 session_state，因此只在步驟切換後與每 SA_SESSION_BUDGET_EVERY 次 rerun 檢查一次
+# Excel / 圖表等衍生資料放在 process 共用的快取 (有總量上限)，不放在 session_state
+# =================================================================================================
+
+# 各步驟的 widget key 前綴 (與 drafts.DRAFT_KEY_PREFIXES 對應)
+STEP_WIDGET_PREFIXES = {
+    "stakeholder": ("sh_",),
+    "materiality": ("mat_sel_", "mat_stat_", "mat_oval_", "mat_oprob_", "mat_rimp_", "mat_rprob_"),
+    "tcfd": ("tcfd_",),
+    "hrdd": ("hr_",),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def widget_step(key):
+    # widget key -> 所屬步驟編號；不是作答 widget 時回傳 None
+    if not is_draft_key(key):
+        return None
+    for step, prefixes in STEP_WIDGET_PREFIXES.items():
+        if key.startswith(prefixes):
+            return STEP_NUMBERS[step]
+    return None
+
+
+def release_step(state, step):
+    # 步驟結果已提交：移除該步驟的 widget 值與草稿比對副本，回傳移除的 key 數
+    prefixes = STEP_WIDGET_PREFIXES[step]
+    keys = [key for key in state if isinstance(key, str) and key.startswith(prefixes)]
+    for key in keys:
+        del state[key]
+    saved = state.get("draft_saved")
+    if saved:
+        for key in [key for key in saved if key.startswith(prefixes)]:
+            del saved[key]
+    metrics.count("sa_session_keys_released_total", len(keys))
+    return len(keys)
+
+
+def pin_widget_values(state):
+    # 不顯示作答 widget 就結束的 rerun (等候室、rerun 速率限制) 會讓 Streamlit 清除這些 widget 的值；
+    # 重新指定一次使其成為一般的 session_state 值而被保留，下一次顯示 widget 時即為其值
+    for key in [key for key in state if widget_step(key) is not None]:
+        state[key] = state[key]
+
+
+def release_completed(state):
+    # 目前步驟之前的作答 widget 值 (例如返回後又前進、或舊版續填還原的值) 一律移除
+    current = state.get("step", 0)
+    keys = [key for key in state if widget_step(key) is not None and widget_step(key) < current]
+    for key in keys:
+        del state[key]
+    metrics.count("sa_session_keys_released_total", len(keys))
+    return len(keys)
+
+
+def enforce_budget(state, budget_bytes, every=20):
+    # 回傳檢查後的 session_state 大小 (bytes)；budget_bytes <= 0 或這次 rerun 不需檢查時回傳 None
+    if budget_bytes <= 0:
+        return None
+    step = state.get("step", 0)
+    reruns = state.get("budget_reruns", 0) + 1
+    if step == state.get("budget_step") and reruns < every:
+        state["budget_reruns"] = reruns
+        return None
+    state["budget_step"], state["budget_reruns"] = step, 0
+    size = state_bytes(state)
+    if size <= budget_bytes:
+        return size
+
+    # 1. 已完成步驟殘留的 widget 值 (結果已在 ResponseRecord)
+    # 2. 草稿比對副本：清空後下一次自動保存會重新送出目前的作答值 (草稿內容不變)
+    metrics.count("sa_session_budget_evictions_total")
+    release_completed(state)
+    if state.get("draft_saved"):
+        state["draft_saved"] = {}
+    size = state_bytes(state)
+    if size > budget_bytes:
+        metrics.count("sa_session_over_budget_total")
+        logger.warning("Session state is %d bytes after cleanup (budget %d bytes)", size, budget_bytes)
+    return size
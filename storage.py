@@ -0,0 +1,377 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from idempotency import SubmissionFilter, content_digest
+
+# =================================================================================================
+# 作答結果持久化 (SQLite)
+# - WAL 模式：讀取不會阻擋寫入，多個 worker 可同時查詢
+# - 連線池：重複使用 sqlite3 連線，避免每次查詢重新開檔
+# - 背景寫入執行緒：Streamlit script thread 只把資料放進佇列即返回，不等待磁碟 I/O；
+#   寫入執行緒會把佇列中累積的多筆提交合併成一個 transaction (executemany)
+# - 佇列有上限 (queue_size)：已滿時 submit_* 不等待，丟出 StoreQueueFull，由呼叫端稍後重送
+# 資料格式：每個議題的每個分數一列，以 (campaign, respondent, section, topic, metric) 為鍵
+# (由 results.ResponseRecord.rows 產生)
+# 去重：提交帶有 (步驟, 作答內容雜湊) 時，與同一填答者同一步驟的上一次提交相同即丟棄 (見 idempotency.py)
+# 增量彙總：score_totals (各議題 × 指標的筆數與總和) 與 department_counts (各部門填答人數)
+# 由 trigger 在每次寫入時以差值更新，管理頁只需讀取 O(議題數) 列，不需重新掃描所有作答
+# trigger 是固定的 schema，批次提交 (submit_many，api.py) 同樣由 trigger 在同一個 transaction 內維護彙總
+# =================================================================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS respondents (
+    campaign    TEXT NOT NULL,
+    respondent  TEXT NOT NULL,
+    name        TEXT,
+    department  TEXT,
+    language    TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (campaign, respondent)
+);
+CREATE TABLE IF NOT EXISTS scores (
+    campaign     TEXT NOT NULL,
+    respondent   TEXT NOT NULL,
+    section      TEXT NOT NULL,
+    topic        TEXT NOT NULL,
+    metric       TEXT NOT NULL,
+    value        INTEGER NOT NULL,
+    submitted_at REAL NOT NULL,
+    PRIMARY KEY (campaign, respondent, section, topic, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scores_section ON scores (campaign, section, topic);
+
+CREATE TABLE IF NOT EXISTS score_totals (
+    campaign  TEXT NOT NULL,
+    section   TEXT NOT NULL,
+    topic     TEXT NOT NULL,
+    metric    TEXT NOT NULL,
+    n         INTEGER NOT NULL,
+    total     INTEGER NOT NULL,
+    PRIMARY KEY (campaign, section, topic, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS department_counts (
+    campaign    TEXT NOT NULL,
+    department  TEXT NOT NULL,
+    n           INTEGER NOT NULL,
+    PRIMARY KEY (campaign, department)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_scores_insert AFTER INSERT ON scores BEGIN
+    INSERT INTO score_totals (campaign, section, topic, metric, n, total)
+    VALUES (NEW.campaign, NEW.section, NEW.topic, NEW.metric, 1, NEW.value)
+    ON CONFLICT DO UPDATE SET n = n + 1, total = total + excluded.total;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_scores_update AFTER UPDATE OF value ON scores BEGIN
+    UPDATE score_totals SET total = total + NEW.value - OLD.value
+    WHERE campaign = OLD.campaign AND section = OLD.section AND topic = OLD.topic AND metric = OLD.metric;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_scores_delete AFTER DELETE ON scores BEGIN
+    UPDATE score_totals SET n = n - 1, total = total - OLD.value
+    WHERE campaign = OLD.campaign AND section = OLD.section AND topic = OLD.topic AND metric = OLD.metric;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_respondents_insert AFTER INSERT ON respondents BEGIN
+    INSERT INTO department_counts (campaign, department, n) VALUES (NEW.campaign, COALESCE(NEW.department, ''), 1)
+    ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_respondents_update AFTER UPDATE OF department ON respondents
+WHEN COALESCE(NEW.department, '') != COALESCE(OLD.department, '') BEGIN
+    UPDATE department_counts SET n = n - 1 WHERE campaign = OLD.campaign AND department = COALESCE(OLD.department, '');
+    INSERT INTO department_counts (campaign, department, n) VALUES (NEW.campaign, COALESCE(NEW.department, ''), 1)
+    ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+"""
+
+# 彙總表建立前已存在的資料，於升級時一次回填
+SCHEMA_VERSION = 2
+BACKFILL = (
+    "DELETE FROM score_totals",
+    "INSERT INTO score_totals (campaign, section, topic, metric, n, total) "
+    "SELECT campaign, section, topic, metric, COUNT(*), SUM(value) FROM scores GROUP BY campaign, section, topic, metric",
+    "DELETE FROM department_counts",
+    "INSERT INTO department_counts (campaign, department, n) "
+    "SELECT campaign, COALESCE(department, ''), COUNT(*) FROM respondents GROUP BY campaign, COALESCE(department, '')",
+)
+
+SCORE_COLUMNS = ("campaign", "respondent", "name", "department", "section", "topic", "metric", "value")
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class StoreQueueFull(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, path, size=4):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def _respondent_keys(kind, payload):
+    # 佇列項目 -> {(campaign, respondent)}
+    if kind == "respondent":
+        return {payload[:2]}
+    if kind == "respondents":
+        return {row[:2] for row in payload}
+    deletes, rows = payload
+    return {row[:2] for row in deletes} | {row[:2] for row in rows}
+
+
+class ResponseStore:
+    def __init__(self, path, pool_size=4, queue_size=10000, batch_size=500, dedupe_entries=50000):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.pool = ConnectionPool(path, size=pool_size)
+        self.dedupe = SubmissionFilter(max_entries=dedupe_entries)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write_loop, name="response-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _migrate(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                for sql in BACKFILL:
+                    conn.execute(sql)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- 寫入 (非同步) ---
+    # 回傳 False 表示與上一次提交相同，已丟棄
+    def submit_respondent(self, campaign, respondent, user_info, language=None):
+        info = (user_info.get("Name"), user_info.get("Department"), language)
+        if not self.dedupe.admit((campaign, respondent, "respondent"), content_digest(json.dumps(info))):
+            return False
+        self._enqueue("respondent", (campaign, respondent, *info, time.time()))
+        return True
+
+    def submit_rows(self, campaign, respondent, rows, replace_sections=(), idempotency=None):
+        # replace_sections：先刪除該填答者這些 section 的舊資料 (例如重新選擇的重大性議題)
+        # idempotency：(步驟, 作答內容雜湊)，例如 ResponseRecord.step_digest
+        if idempotency is not None:
+            step, digest = idempotency
+            if not self.dedupe.admit((campaign, respondent, step), digest):
+                return False
+        now = time.time()
+        self._enqueue("scores", (
+            [(campaign, respondent, section) for section in replace_sections],
+            [(campaign, respondent, section, topic, metric, value, now) for section, topic, metric, value in rows],
+        ))
+        return True
+
+    def submit_many(self, campaign, respondents, rows, replace_sections=()):
+        # 批次提交 (api.py)：respondents 為 (respondent, name, department, language)，
+        # rows 為 (respondent, section, topic, metric, value)；整批只放入兩個佇列項目
+        # 這些填答者在 replace_sections 與 rows 出現的 section 中的舊資料一律先刪除 (整批取代)
+        now = time.time()
+        sections = dict.fromkeys(replace_sections)
+        sections.update(dict.fromkeys({row[1] for row in rows}))
+        self._enqueue("respondents", [(campaign, *respondent, now) for respondent in respondents])
+        self._enqueue("scores", (
+            [(campaign, respondent[0], section) for respondent in respondents for section in sections],
+            [(campaign, *row, now) for row in rows],
+        ))
+
+    def _enqueue(self, kind, payload):
+        # 寫入跟不上時不阻擋呼叫端 (Streamlit script thread / API 請求)
+        # 忘記這些填答者的去重紀錄，呼叫端重送相同內容時才會再寫入
+        try:
+            self._queue.put_nowait((kind, payload))
+        except queue.Full:
+            keys = _respondent_keys(kind, payload)
+            logger.warning("Write queue of %s is full, dropping %s submission for %d respondent(s)",
+                           self.path, kind, len(keys))
+            self.dedupe.forget(keys)
+            raise StoreQueueFull(f"{self._queue.maxsize} submissions already queued") from None
+
+    def flush(self):
+        # 等待目前佇列中的資料全部寫入 (CLI / 測試用)
+        self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            # 一次取出佇列中累積的提交，合併成一個 transaction
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(item)
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # 合併的 transaction 失敗 (已 ROLLBACK)：逐筆重寫，只有出錯的那筆提交失敗，不影響其他填答者
+                logger.warning("Batch of %d queued submissions failed, retrying one by one", len(batch), exc_info=True)
+                self._write_each(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_each(self, batch):
+        for item in batch:
+            try:
+                self._write_batch([item])
+            except Exception:
+                # 任何錯誤都不可讓背景執行緒結束，否則之後的提交都會卡在佇列中
+                # 忘記這些填答者的去重紀錄，用戶端重送時可以再寫入一次
+                kind, payload = item
+                keys = _respondent_keys(kind, payload)
+                logger.exception("Failed to write %s submission for %d respondent(s) to %s", kind, len(keys), self.path)
+                self.dedupe.forget(keys)
+
+    def _write_batch(self, batch):
+        # 使用 UPSERT 而非 INSERT OR REPLACE：REPLACE 的隱含刪除不會觸發 trigger，彙總會重複計算
+        respondents = []
+        for kind, payload in batch:
+            if kind == "respondent":
+                respondents.append(payload)
+            elif kind == "respondents":
+                respondents.extend(payload)
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                if respondents:
+                    conn.executemany(
+                        "INSERT INTO respondents (campaign, respondent, name, department, language, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET name = excluded.name, "
+                        "department = excluded.department, language = excluded.language, updated_at = excluded.updated_at",
+                        respondents,
+                    )
+                # 分數依提交順序寫入，刪除舊 section 前先寫完之前累積的列
+                pending = []
+                for kind, payload in batch:
+                    if kind != "scores":
+                        continue
+                    deletes, rows = payload
+                    if deletes:
+                        self._write_scores(conn, pending)
+                        pending = []
+                        conn.executemany(
+                            "DELETE FROM scores WHERE campaign = ? AND respondent = ? AND section = ?", deletes
+                        )
+                    pending.extend(rows)
+                self._write_scores(conn, pending)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _write_scores(conn, rows):
+        if rows:
+            conn.executemany(
+                "INSERT INTO scores (campaign, respondent, section, topic, metric, value, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET "
+                "value = excluded.value, submitted_at = excluded.submitted_at",
+                rows,
+            )
+
+    # --- 讀取 ---
+    # 欄位順序與 SCORE_COLUMNS 相同
+    def _scores_query(self, campaign, section):
+        sql = (
+            "SELECT s.campaign, s.respondent, r.name, r.department, s.section, s.topic, s.metric, s.value "
+            "FROM scores s LEFT JOIN respondents r ON r.campaign = s.campaign AND r.respondent = s.respondent"
+        )
+        where, params = [], []
+        if campaign is not None:
+            where.append("s.campaign = ?")
+            params.append(campaign)
+        if section is not None:
+            where.append("s.section = ?")
+            params.append(section)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    def read_scores(self, campaign=None, section=None):
+        sql, params = self._scores_query(campaign, section)
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def iter_scores(self, campaign=None, section=None, chunk_size=10000):
+        # 以 fetchmany 分批讀取，大量匯出時記憶體用量固定
+        sql, params = self._scores_query(campaign, section)
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql + " ORDER BY s.campaign, s.respondent, s.section, s.topic, s.metric", params)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    # 增量彙總 (讀取量與作答數無關)
+    def read_totals(self, campaign, section=None):
+        # (section, topic, metric, n, total)
+        sql = "SELECT section, topic, metric, n, total FROM score_totals WHERE campaign = ? AND n > 0"
+        params = [campaign]
+        if section is not None:
+            sql += " AND section = ?"
+            params.append(section)
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def read_department_counts(self, campaign):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT department, n FROM department_counts WHERE campaign = ? AND n > 0 ORDER BY n DESC, department",
+                (campaign,),
+            ).fetchall()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self.pool.close()
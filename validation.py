@@ -0,0 +1,75 @@
+from lazy import lazy_import
+from results import STATUS_CODES
+
+np = lazy_import("numpy")
+
+# =================================================================================================
+# 作答規則 (填答介面與 api.py 共用)
+# 輸入為 results.ResponseRecord 格式的陣列；單一填答者或多位填答者堆疊 (最前面多一個 n 軸) 皆可，
+# 規則沿最後的軸計算，整批一次判斷，不逐位填答者迴圈
+# api.py 以 float 陣列傳入 (JSON 的數字)，因此分數另外檢查是否為整數
+# =================================================================================================
+
+SCORE_MIN, SCORE_MAX = 1, 5
+# 重大性議題必須正好選擇的數量
+MATERIALITY_SELECTION = 10
+
+# validate_batch 的錯誤代碼 -> 訊息
+ERRORS = {
+    "stakeholder_scores": "stakeholder: every score must be an integer from 1 to 5",
+    "materiality_count": f"materiality: exactly {MATERIALITY_SELECTION} topics must be selected",
+    "materiality_scores": "materiality: selected topics need status Actual/Potential and integer scores from 1 to 5",
+    "tcfd_scores": "tcfd: every opportunity and risk needs integer scores from 1 to 5",
+    "hrdd_scores": "hrdd: every topic needs integer severity and probability from 1 to 5",
+    "hrdd_chain_flags": "hrdd: supplier / customer flags must be 0 or 1",
+    "hrdd_value_chain": "hrdd: every topic must be linked to the supplier and/or customer value chain",
+}
+
+
+def valid_scores(values):
+    # 逐格判斷：1-5 的整數
+    return (values >= SCORE_MIN) & (values <= SCORE_MAX) & (values == np.floor(values))
+
+
+def scores_in_range(values):
+    # (..., 議題數, 指標數) -> (...,)：所有分數皆有效
+    return valid_scores(values).all(axis=(-2, -1))
+
+
+def materiality_selected(materiality):
+    # (..., 議題數, 5) -> (...,) 選入的議題數 (Status 欄非 0)
+    return (materiality[..., 0] != 0).sum(axis=-1)
+
+
+def materiality_scores_ok(materiality):
+    # 選入的議題 Status 為 Actual / Potential 且分數有效；未選的議題不檢查
+    selected = materiality[..., 0] != 0
+    status_ok = np.isin(materiality[..., 0], list(STATUS_CODES.values()))
+    scores_ok = valid_scores(materiality[..., 1:]).all(axis=-1)
+    return (~selected | (status_ok & scores_ok)).all(axis=-1)
+
+
+def missing_value_chain(chain):
+    # (..., 議題數, 2) -> (..., 議題數)：Supplier / Customer 都沒有勾選的 HRDD 議題
+    return ~np.asarray(chain, dtype=bool).any(axis=-1)
+
+
+def validate_batch(batch, steps):
+    # batch: 步驟 -> (n, ...) 陣列 (hrdd 為 (n, 議題數, 4)：Severity, Probability, Supplier, Customer)
+    # 回傳 錯誤代碼 -> (n,) bool，True 表示該筆違反規則
+    failed = {}
+    if "stakeholder" in steps:
+        failed["stakeholder_scores"] = ~scores_in_range(batch["stakeholder"])
+    if "materiality" in steps:
+        mat = batch["materiality"]
+        failed["materiality_count"] = materiality_selected(mat) != MATERIALITY_SELECTION
+        failed["materiality_scores"] = ~materiality_scores_ok(mat)
+    if "tcfd" in steps:
+        failed["tcfd_scores"] = ~scores_in_range(batch["tcfd"])
+    if "hrdd" in steps:
+        hrdd = batch["hrdd"]
+        chain = hrdd[..., 2:]
+        failed["hrdd_scores"] = ~scores_in_range(hrdd[..., :2])
+        failed["hrdd_chain_flags"] = ~np.isin(chain, (0, 1)).all(axis=(-2, -1))
+        failed["hrdd_value_chain"] = missing_value_chain(chain).any(axis=-1)
+    return failed